@@ -0,0 +1,357 @@
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Summary fields compared against a baseline; counts and rates are reported but not gated.
+LATENCY_FIELDS = ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms")
+
+
+def load_trace(path: Path) -> List[Dict[str, Any]]:
+    """One request per line.
+
+    ``{"method", "path", "json"}`` for JSON endpoints; uploads use ``"file"``
+    (a path relative to the trace) or ``"image": {"width", "height"}`` for a
+    generated page, plus optional ``"form"`` fields. ``"name"`` overrides the
+    endpoint label and ``"weight"`` repeats the entry within each iteration.
+    """
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                entry = json.loads(line)
+                entry.setdefault("method", "POST" if ("json" in entry or "file" in entry or "image" in entry) else "GET")
+                entry.setdefault("name", f"{entry['method']} {entry['path']}")
+                if "file" in entry:
+                    entry["file"] = str((path.parent / entry["file"]).resolve())
+                entries.extend([entry] * int(entry.get("weight", 1)))
+    return entries
+
+
+def synthetic_page(width: int, height: int, seed: int) -> bytes:
+    """A white page with dark text-like bars, enough for decode, hashing and OCR to do real work."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    y = height // 12
+    while y < height - height // 12:
+        x = width // 12
+        while x < width - width // 6:
+            w = rng.randint(width // 40, width // 12)
+            draw.rectangle((x, y, x + w, y + height // 80), fill=rng.randint(0, 80))
+            x += w + width // 60
+        y += height // 30
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear interpolation between closest ranks; ``values`` must be sorted."""
+    if not values:
+        return 0.0
+    pos = (len(values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def summarize(samples: List[float], duration: float) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "rps": round(len(ordered) / duration, 2) if duration else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p95_ms": round(percentile(ordered, 0.95), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+        "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latency: Dict[str, List[float]] = {}
+        self.first_byte: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.stages: Dict[str, List[float]] = {}
+        # Cached and coalesced responses repeat the timings of the run that computed them.
+        self._seen_ids: set = set()
+
+    def request(self, name: str, total_ms: float, first_byte_ms: float, ok: bool) -> None:
+        self.latency.setdefault(name, []).append(total_ms)
+        self.first_byte.setdefault(name, []).append(first_byte_ms)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def pipeline(self, payload: Dict[str, Any]) -> None:
+        rid = payload.get("id")
+        if rid is None or rid in self._seen_ids:
+            return
+        self._seen_ids.add(rid)
+        for stage, ms in (payload.get("stage_timings_ms") or {}).items():
+            self.stages.setdefault(stage, []).append(float(ms))
+        for page in payload.get("pages") or []:
+            for step, ms in (page.get("timings_ms") or {}).items():
+                self.stages.setdefault(f"ocr.{step}", []).append(float(ms))
+
+
+def _pipeline_payload(body: bytes, content_type: str) -> Optional[Dict[str, Any]]:
+    """The response fields that carry stage timings, from a JSON or an NDJSON stream response."""
+    if content_type.startswith("application/json"):
+        data = json.loads(body)
+        return data if isinstance(data, dict) and "stage_timings_ms" in data else None
+    if content_type.startswith("application/x-ndjson"):
+        merged: Dict[str, Any] = {}
+        for line in body.splitlines():
+            event = json.loads(line)
+            if event["event"] == "id":
+                merged["id"] = event["data"]["id"]
+            elif event["event"] == "pages":
+                merged["pages"] = event["data"]
+            elif event["event"] == "done":
+                merged.update(event["data"])
+        return merged if "stage_timings_ms" in merged else None
+    return None
+
+
+class Replayer:
+    def __init__(self, client: Any, headers: Dict[str, str], unique_uploads: bool) -> None:
+        self.client = client
+        self.headers = headers
+        self.unique_uploads = unique_uploads
+        self._files: Dict[str, bytes] = {}
+
+    def _upload(self, entry: Dict[str, Any], seq: int) -> Tuple[str, bytes, str]:
+        if "image" in entry:
+            spec = entry["image"]
+            key = f"image:{spec['width']}x{spec['height']}:{spec.get('seed', 0)}"
+            if key not in self._files:
+                self._files[key] = synthetic_page(spec["width"], spec["height"], spec.get("seed", 0))
+            name, content_type = "page.png", "image/png"
+        else:
+            key = entry["file"]
+            if key not in self._files:
+                self._files[key] = Path(key).read_bytes()
+            name = Path(key).name
+            content_type = entry.get("content_type") or (
+                "application/pdf" if name.endswith(".pdf") else "image/png" if name.endswith(".png") else "image/jpeg"
+            )
+        data = self._files[key]
+        if self.unique_uploads:
+            # Bytes after the image's end marker change the digest but not the decoded page.
+            data += seq.to_bytes(8, "big", signed=True)
+        return name, data, content_type
+
+    async def send(self, entry: Dict[str, Any], seq: int, recorder: Recorder) -> None:
+        kwargs: Dict[str, Any] = {"headers": {**self.headers, **entry.get("headers", {})}}
+        if "json" in entry:
+            kwargs["json"] = entry["json"]
+        if "file" in entry or "image" in entry:
+            kwargs["files"] = {"file": self._upload(entry, seq)}
+            kwargs["data"] = entry.get("form", {})
+        start = time.perf_counter()
+        first_byte = None
+        chunks = []
+        try:
+            async with self.client.stream(entry["method"], entry["path"], **kwargs) as resp:
+                async for chunk in resp.aiter_bytes():
+                    if first_byte is None:
+                        first_byte = time.perf_counter()
+                    chunks.append(chunk)
+                status, content_type = resp.status_code, resp.headers.get("content-type", "")
+        except Exception as exc:
+            print(f"{entry['name']}: {type(exc).__name__}: {exc}", file=sys.stderr)
+            status, content_type = 0, ""
+        end = time.perf_counter()
+        ok = 200 <= status < 300
+        recorder.request(entry["name"], (end - start) * 1000, ((first_byte or end) - start) * 1000, ok)
+        if ok:
+            payload = _pipeline_payload(b"".join(chunks), content_type)
+            if payload is not None:
+                recorder.pipeline(payload)
+
+
+async def _wait_ready(client: Any, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if (await client.get("/v1/ready")).status_code == 200:
+            return
+        await asyncio.sleep(0.2)
+    raise SystemExit(f"models not ready after {timeout:.0f}s: {(await client.get('/v1/ready')).json()}")
+
+
+async def run(
+    trace: List[Dict[str, Any]],
+    concurrency: int,
+    iterations: int,
+    warmup: int,
+    unique_uploads: bool,
+    ready_timeout: float,
+    log_level: str = "WARNING",
+) -> Dict[str, Any]:
+    import httpx
+
+    from app.core.auth import create_jwt
+    from app.main import app
+
+    # Per-request app and client logs would dominate the output and add their own latency.
+    logging.getLogger().setLevel(log_level)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # ASGITransport does not send lifespan events, so run the startup hooks directly.
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await _wait_ready(client, ready_timeout)
+            replayer = Replayer(client, {"Authorization": f"Bearer {create_jwt('bench', admin=True)}"}, unique_uploads)
+
+            scratch = Recorder()
+            for seq, entry in enumerate(trace[:warmup] if warmup else []):
+                await replayer.send(entry, -1 - seq, scratch)
+
+            recorder = Recorder()
+            queue: asyncio.Queue = asyncio.Queue()
+            for seq, entry in enumerate(trace * iterations):
+                queue.put_nowait((seq, entry))
+
+            async def worker() -> None:
+                while not queue.empty():
+                    seq, entry = queue.get_nowait()
+                    await replayer.send(entry, seq, recorder)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+            duration = time.perf_counter() - start
+    finally:
+        await app.router.shutdown()
+
+    total = sum(len(v) for v in recorder.latency.values())
+    endpoints = {}
+    for name, samples in sorted(recorder.latency.items()):
+        summary = summarize(samples, duration)
+        errors = recorder.errors.get(name, 0)
+        summary["errors"] = errors
+        summary["error_rate"] = round(errors / len(samples), 4)
+        summary["first_byte_p95_ms"] = round(percentile(sorted(recorder.first_byte[name]), 0.95), 2)
+        endpoints[name] = summary
+    return {
+        "requests": total,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(total / duration, 2) if duration else 0.0,
+        "endpoints": endpoints,
+        "stages": {name: summarize(samples, duration) for name, samples in sorted(recorder.stages.items())},
+    }
+
+
+def regressions(
+    result: Dict[str, Any],
+    baseline: Optional[Dict[str, Any]],
+    metric: str,
+    threshold: float,
+    min_delta_ms: float,
+    max_error_rate: float,
+) -> List[str]:
+    """Human-readable reasons the run should fail; empty when it passes."""
+    failures = []
+    for name, summary in result["endpoints"].items():
+        if summary["error_rate"] > max_error_rate:
+            failures.append(f"{name}: error rate {summary['error_rate']:.2%} > {max_error_rate:.2%}")
+    if baseline is None:
+        return failures
+    for section in ("endpoints", "stages"):
+        for name, summary in result[section].items():
+            before = baseline.get(section, {}).get(name)
+            if not before or metric not in before:
+                continue
+            now, then = summary[metric], before[metric]
+            # The absolute floor keeps sub-millisecond jitter from failing the run.
+            if now > then * (1 + threshold) and now - then > min_delta_ms:
+                change = f"+{now / then - 1:.0%}" if then else "new"
+                failures.append(f"{section[:-1]} {name}: {metric} {then:.1f} -> {now:.1f} ms ({change})")
+    return failures
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"{result['requests']} requests in {result['duration_s']:.2f}s, {result['throughput_rps']:.1f} req/s")
+    for section in ("endpoints", "stages"):
+        if not result[section]:
+            continue
+        print()
+        print(f"{section:<40} {'count':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6}")
+        for name, s in result[section].items():
+            print(
+                f"{name:<40} {s['count']:>6} {s['rps']:>8.1f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+                f"{s['p99_ms']:>8.1f} {s.get('errors', 0):>6}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a request trace against the app in-process and report latency")
+    parser.add_argument("--trace", default=str(Path(__file__).resolve().parent / "traces" / "sample.jsonl"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=20, help="Times the whole trace is replayed")
+    parser.add_argument("--warmup", type=int, default=0, help="Trace entries sent once, unmeasured, before the run")
+    parser.add_argument("--real", action="store_true", help="Use real models instead of forcing USE_MOCK_MODE")
+    parser.add_argument("--unique_uploads", action="store_true", help="Make every upload distinct so no cache or dedup applies")
+    parser.add_argument("--ready_timeout", type=float, default=300.0)
+    parser.add_argument("--log_level", default="WARNING", help="Root log level while the benchmark runs")
+    parser.add_argument("--out", default=None, help="Write the results JSON here")
+    parser.add_argument("--baseline", default=None, help="Results JSON from an earlier run to compare against")
+    parser.add_argument("--metric", default="p95_ms", choices=LATENCY_FIELDS)
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown versus the baseline")
+    parser.add_argument("--min_delta_ms", type=float, default=2.0, help="Slowdowns smaller than this never fail")
+    parser.add_argument("--max_error_rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Settings are read when app.main is imported, so these must be in place first.
+    if not args.real:
+        os.environ["USE_MOCK_MODE"] = "true"
+    os.environ.setdefault("RATE_LIMIT_RPM", str(10**9))
+    if args.unique_uploads:
+        os.environ["PHASH_ENABLED"] = "false"
+
+    trace = load_trace(Path(args.trace))
+    result = asyncio.run(
+        run(
+            trace,
+            args.concurrency,
+            args.iterations,
+            args.warmup,
+            args.unique_uploads,
+            args.ready_timeout,
+            args.log_level,
+        )
+    )
+    result["config"] = {
+        "trace": args.trace,
+        "concurrency": args.concurrency,
+        "iterations": args.iterations,
+        "mock": not args.real,
+        "unique_uploads": args.unique_uploads,
+    }
+    print_report(result)
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, indent=2))
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    failures = regressions(result, baseline, args.metric, args.threshold, args.min_delta_ms, args.max_error_rate)
+    for failure in failures:
+        print("REGRESSION", failure, file=sys.stderr)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
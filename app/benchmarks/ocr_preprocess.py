@@ -0,0 +1,91 @@
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from app.services.ocr import OcrService
+from app.services.ocr_preprocess import PRESETS
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+def edit_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def char_accuracy(predicted: str, truth: str) -> float:
+    # Whitespace and line breaks depend on paragraph grouping, not on recognition quality.
+    predicted, truth = "".join(predicted.split()), "".join(truth.split())
+    if not truth:
+        return 1.0 if not predicted else 0.0
+    return max(0.0, 1 - edit_distance(predicted, truth) / len(truth))
+
+
+def samples(directory: Path) -> List[tuple[Path, str]]:
+    """Images with a sibling ``<stem>.txt`` holding the expected text."""
+    found = []
+    for path in sorted(directory.iterdir()):
+        truth = path.with_suffix(".txt")
+        if path.suffix.lower() in IMAGE_SUFFIXES and truth.exists():
+            found.append((path, truth.read_text(encoding="utf-8")))
+    return found
+
+
+def bench(preset: str, pages: List[tuple[Path, str]], repeat: int) -> Dict[str, object]:
+    service = OcrService(preset=preset)
+    service.ensure_loaded()
+    if service.reader is None:
+        raise SystemExit("EasyOCR is not available; set USE_MOCK_MODE=false and install easyocr")
+    latencies: List[float] = []
+    accuracies: List[float] = []
+    steps: Dict[str, List[int]] = {}
+    for path, truth in pages:
+        data = path.read_bytes()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text, timings = service.read_image(data)
+            latencies.append((time.perf_counter() - start) * 1000)
+            for step, ms in timings.items():
+                steps.setdefault(step, []).append(ms)
+        accuracies.append(char_accuracy(text, truth))
+    return {
+        "preset": preset,
+        "pages": len(pages),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "max_ms": round(max(latencies), 1),
+        "char_accuracy": round(statistics.mean(accuracies), 4),
+        "steps_ms": {step: round(statistics.mean(ms), 1) for step, ms in steps.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR latency versus character accuracy per preprocessing preset")
+    parser.add_argument("--samples", required=True, help="Directory of page images with <stem>.txt ground truth")
+    parser.add_argument("--presets", default=",".join(PRESETS))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", default=None, help="Also write results to this file")
+    args = parser.parse_args()
+
+    pages = samples(Path(args.samples))
+    if not pages:
+        raise SystemExit(f"No image/.txt pairs found in {args.samples}")
+    results = [bench(p.strip(), pages, args.repeat) for p in args.presets.split(",") if p.strip()]
+
+    print(f"{'preset':>10} {'p50 ms':>9} {'max ms':>9} {'char acc':>9}  steps")
+    for r in results:
+        steps = " ".join(f"{k}={v}" for k, v in r["steps_ms"].items())  # type: ignore
+        print(f"{r['preset']:>10} {r['p50_ms']:>9} {r['max_ms']:>9} {r['char_accuracy']:>9}  {steps}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import random
+import time
+
+from app.utils.rate_limit import MemoryGcra
+
+
+def bench(keys: int, checks: int, rpm: int, max_keys: int) -> float:
+    limiter = MemoryGcra(rpm, 60, max_keys)
+    idents = [f"10.0.{i // 256}.{i % 256}" for i in range(keys)]
+    for ident in idents:
+        limiter.check(ident)
+    order = [random.choice(idents) for _ in range(checks)]
+    start = time.perf_counter()
+    for ident in order:
+        limiter.check(ident)
+    return (time.perf_counter() - start) / checks * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-check cost of the in-memory GCRA limiter")
+    parser.add_argument("--keys", default="100,1000,10000,100000", help="Comma-separated table sizes")
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--rpm", type=int, default=60)
+    parser.add_argument("--max_keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'keys':>10} {'ns/check':>10}")
+    for keys in (int(k) for k in args.keys.split(",")):
+        print(f"{keys:>10} {bench(keys, args.checks, args.rpm, args.max_keys):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
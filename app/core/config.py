@@ -1,6 +1,12 @@
 from pydantic_settings import BaseSettings
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
+
+
+class StageLimits(BaseModel):
+    kind: str = "thread"  # "thread" or "process"
+    workers: int = 1
+    queue_size: int = 16
 
 
 class Settings(BaseSettings):
@@ -9,15 +15,52 @@ class Settings(BaseSettings):
 
     # Limits & privacy
     max_upload_mb: int = 10
+    max_batch_items: int = 256
+    pdf_dpi: int = 150
+    pdf_max_pages: int = 64
+    ocr_preset: str = "balanced"  # fast | balanced | quality
+    ocr_recognize_batch_size: int = 16
     data_retention_hours: int = 24
 
     # Batching & caching
     max_batch_size: int = 8
     batch_timeout_ms: int = 10
     cache_ttl_seconds: int = 3600
+    cache_l1_max_entries: int = 10000
+    cache_l1_max_bytes: int = 64 * 1024 * 1024
+    cache_l1_ttl_seconds: int = 60  # upper bound on L1 staleness when Redis is the L2
+    cache_sweep_interval_seconds: int = 30
+
+    # Near-duplicate photos resolve to the first upload within this many differing hash bits.
+    # Off by default: a match serves another upload's cached results, and pages sharing a layout can match.
+    phash_enabled: bool = False
+    phash_algorithm: str = "phash"  # phash | dhash
+    phash_max_distance: int = 4
+    phash_index_path: str = "data/phash_index.jsonl"
+    phash_index_max_entries: int = 50000  # entries also expire after data_retention_hours
+
+    # Request coalescing; the Redis lock extends single-flight across workers
+    singleflight_redis_lock: bool = False
+    singleflight_lock_ttl_ms: int = 30000
+    singleflight_poll_ms: int = 100
+    translation_max_segment_chars: int = 200
+    translation_max_new_tokens: int = 256
+
+    # Inference execution (per-stage pools; override with INFERENCE_STAGES as JSON)
+    inference_stages: Dict[str, StageLimits] = {
+        "ocr": StageLimits(workers=1, queue_size=8),
+        "pdf": StageLimits(kind="process", workers=2, queue_size=256),
+        "translation": StageLimits(workers=1, queue_size=64),
+        "tokenizer": StageLimits(workers=2, queue_size=64),
+        "intent": StageLimits(workers=2, queue_size=64),
+        "ner": StageLimits(workers=2, queue_size=64),
+        "io": StageLimits(workers=8, queue_size=256),
+    }
+    inference_retry_after_seconds: int = 2
 
     # Rate limiting
     rate_limit_rpm: int = 60
+    rate_limit_memory_max_keys: int = 100_000
 
     # Auth
     jwt_secret: str = "change-me"
@@ -27,11 +70,52 @@ class Settings(BaseSettings):
 
     # External
     redis_url: Optional[str] = None
+    redis_max_connections: int = 50
+    redis_socket_timeout_ms: int = 250
+    redis_connect_timeout_ms: int = 250
+    redis_health_check_interval_seconds: int = 5
+    redis_breaker_failures: int = 5  # consecutive failures before falling back to memory
+    redis_breaker_reset_seconds: int = 10
 
     # Models
     translation_model: str = "Helsinki-NLP/opus-mt-ja-en"
     intent_model: str = "cl-tohoku/bert-base-japanese"
+    intent_linear_path: str = "models/intent/intent_linear.npz"  # hashed n-gram model from train_intent.py
+    intent_cache_size: int = 4096
     ner_model: str = "cl-tohoku/bert-base-japanese"
+    tokenizer_cache_size: int = 8192  # memoized tokenizations, keyed by text digest
+    gazetteer_path: Optional[str] = None  # term<TAB>TYPE dictionary; defaults to app/data/gazetteer.tsv
+
+    # Inference backend: "torch" (eager) or "onnx" (exports from app/training/export_onnx.py)
+    inference_backend: str = "torch"
+    onnx_model_dir: str = "onnx"
+    onnx_quantized: bool = True
+    onnx_intra_op_threads: int = 2
+    onnx_inter_op_threads: int = 1
+
+    # Model loading: eager models load concurrently after startup; lazy ones on first use
+    lazy_models: List[str] = []
+    warmup_enabled: bool = True
+    warmup_texts: List[str] = ["青いスカート ¥5,000。今週のセール！", "イベントは土曜日に開催されます。"]
+
+    # Versioned models live in <registry_dir>/<name>/<version>/; CURRENT names the live one
+    registry_dir: str = "models"
+    registry_watch_interval_seconds: float = 5.0  # how often CURRENT is polled for hot swaps; 0 disables
+
+    # Per-stage histograms (stage_seconds, service_cache_lookups_total); spans follow OTEL_EXPORTER_OTLP_ENDPOINT
+    stage_metrics_enabled: bool = True
+
+    # Training jobs run on their own process pool, niced, pinned and memory-capped
+    jobs_db_path: str = "data/jobs.sqlite3"
+    jobs_dir: str = "data/jobs"
+    corpus_dir: str = "data/corpora"
+    # Pools are per API worker: N gunicorn workers allow N x training_workers concurrent jobs,
+    # each with up to training_memory_mb, so size these together with WEB_CONCURRENCY.
+    training_workers: int = 1
+    training_memory_mb: int = 4096  # RLIMIT_AS per training process; 0 disables
+    training_nice: int = 10
+    training_cpus: List[int] = []  # CPU affinity for training processes; empty inherits the server's
+    training_max_attempts: int = 3  # a job whose process keeps dying (e.g. OOM-killed) fails after this many runs
 
     class Config:
         env_file = ".env"
@@ -42,7 +126,8 @@ settings = Settings()
 
 
 class VersionInfo(BaseModel):
+    # Built per request from the model registry, since models hot-swap while the app runs.
     app_version: str = "0.1.0"
-    translation_model: str = settings.translation_model
-    intent_model: str = settings.intent_model
-    ner_model: str = settings.ner_model
+    translation_model: str
+    intent_model: str
+    ner_model: str
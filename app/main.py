@@ -1,10 +1,15 @@
 import io
+import os
 import time
+import asyncio
 import hashlib
-from typing import Optional
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
+import secrets
+from functools import partial
+from pathlib import Path
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
 
 from app.core.config import settings, VersionInfo
 from app.core.auth import get_current_user, require_admin
@@ -16,13 +21,26 @@ from app.models.schemas import (
     PredictIntentResponse,
     ExtractEntitiesRequest,
     ExtractEntitiesResponse,
+    TranslateBatchRequest,
+    TranslateBatchItem,
+    TranslateBatchResponse,
+    PredictIntentBatchRequest,
+    PredictIntentBatchItem,
+    PredictIntentBatchResponse,
+    ExtractEntitiesBatchRequest,
+    ExtractEntitiesBatchItem,
+    ExtractEntitiesBatchResponse,
     UploadCorpusRequest,
     UploadCorpusResponse,
     TrainTriggerRequest,
     TrainTriggerResponse,
+    JobStatusResponse,
     HealthResponse,
+    ModelReadiness,
+    ReadyResponse,
     StatusResponse,
     IntentScore,
+    PageResult,
     SuggestedAction,
 )
 from app.utils.logging import configure_logging, logger
@@ -30,12 +48,27 @@ from app.utils.rate_limit import rate_limit_dep
 from app.utils.tracing import setup_tracing
 from app.utils.cache import cache
 from app.utils.av_scan import scanner
+from app.utils.executor import executor, ExecutorSaturated
+from app.utils.instrument import cache_lookups
+from app.utils.redis_pool import redis_pool
+from app.utils.singleflight import SingleFlight
+from app.utils.phash import PerceptualIndex
+from app.utils.memory import process_memory, worker_pids
+from app.utils.metrics import PHASH_LOOKUPS
+from app.utils.streaming import encode_event, wants_sse, NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE
 from app.middleware.security import SecurityHeadersMiddleware
+from app.middleware.rate_limit import RateLimitHeadersMiddleware
+from app.middleware.body_limit import BodySizeLimitMiddleware
 from app.services.ocr import OcrService
+from app.services.pdf import InvalidPdf, PdfService
 from app.services.tokenizer import TokenizerService
 from app.services.translation import TranslationService
 from app.services.intent import IntentService
 from app.services.ner import NerService
+from app.services.pipeline import Stage, StagePipeline
+from app.services.model_registry import ModelRegistry
+from app.services.model_store import model_store
+from app.services.jobs import job_store, jobs
 
 from prometheus_fastapi_instrumentator import Instrumentator
 
@@ -54,15 +87,120 @@ app.add_middleware(
     allow_headers=["*"]
 )
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(RateLimitHeadersMiddleware)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    # Leave headroom for multipart boundaries and form fields around the file.
+    max_bytes=settings.max_upload_mb * 1024 * 1024 + 64 * 1024,
+    paths=("/v1/process-magazine",),
+)
 
-ocr_service = OcrService()
-_tok = TokenizerService()
-trans_service = TranslationService()
-intent_service = IntentService()
-ner_service = NerService()
+# Construction is cheap; weights load concurrently once the server is up (see load_models).
+# Translation, intent and NER follow the model store's CURRENT version and hot-swap when it changes.
+models = ModelRegistry(model_store)
+_lazy = set(settings.lazy_models)
+ocr_service = models.register("ocr", OcrService(), lazy="ocr" in _lazy)
+_tok = models.register("tokenizer", TokenizerService(), lazy="tokenizer" in _lazy)
+trans_service = models.register(
+    "translation", TranslationService(model_store.source("translation")), lazy="translation" in _lazy, versioned=True
+)
+intent_service = models.register(
+    "intent", IntentService(model_store.source("intent")), lazy="intent" in _lazy, versioned=True
+)
+ner_service = models.register("ner", NerService(model_store.source("ner")), lazy="ner" in _lazy, versioned=True)
+pdf_service = PdfService(ocr_service)
 
 _start_time = time.time()
-_version = VersionInfo()
+coalescer = SingleFlight("requests")
+phash_index: Optional[PerceptualIndex] = None  # built at startup when phash_enabled
+
+
+async def _cached(ckey: str, model):  # type: ignore
+    cached = await cache.get_json(ckey)
+    return model(**cached) if cached else None
+
+
+async def _canonical_id(content: memoryview, content_type: str, req_id: str) -> str:
+    # A re-photographed page resolves to the id of the first upload that looked the same,
+    # so it shares that upload's cache entries and in-flight computation.
+    if phash_index is None or content_type == "application/pdf":
+        return req_id
+    canonical, distance = await executor.run("io", phash_index.resolve, content, req_id)
+    if distance is None:
+        PHASH_LOOKUPS.labels("miss").inc()
+        return req_id
+    PHASH_LOOKUPS.labels("hit").inc()
+    logger.info("phash_match", id=req_id, match=canonical, distance=distance)
+    return canonical
+
+
+async def _ocr_pages(content: memoryview, content_type: str, req_id: str) -> tuple[List[PageResult], int]:
+    """The pages read, and how many the upload has; PDFs are cut off at pdf_max_pages."""
+    if content_type == "application/pdf":
+        return await pdf_service.extract_pages(content)
+    # OCR text outlives any one target language, so it is cached on its own.
+    key = cache.hash_key(["ocr_pages", settings.ocr_preset, req_id])
+    cached = await cache.get_json(key)
+    cache_lookups("ocr_pages", int(bool(cached)), int(not cached))
+    if cached:
+        return [PageResult(**{**page, "cached": True}) for page in cached], 1
+    text, timings = await executor.run("ocr", ocr_service.read_image, content)
+    pages = [PageResult(page=1, text=text, timings_ms=timings)]
+    await cache.set_json(key, [p.model_dump() for p in pages])
+    return pages, 1
+
+
+async def _document_pages(document: tuple[List[PageResult], int]) -> List[PageResult]:
+    return document[0]
+
+
+def _warnings(result) -> List[str]:  # type: ignore
+    pages, total = result["document"]
+    if total > len(pages):
+        return [f"Document has {total} pages; only the first {len(pages)} were processed"]
+    return []
+
+
+async def _join_pages(pages: List[PageResult]) -> str:
+    return "\n\n".join(page.text for page in pages if page.text)
+
+
+async def _predict_top_intent(text: str) -> IntentScore:
+    scores = await executor.run("intent", intent_service.predict, text, top_k=1)
+    return IntentScore(label=scores[0][0], score=round(scores[0][1], 2))
+
+
+async def _suggest_actions(original_text: str, entities: list) -> list[SuggestedAction]:
+    actions = []
+    if entities:
+        query = original_text[:120]
+        actions.append(
+            SuggestedAction(
+                action="search_online",
+                label="Search this product online",
+                payload={"query": query},
+            )
+        )
+    return actions
+
+
+# OCR gates everything; the text stages then fan out concurrently.
+magazine_pipeline = StagePipeline("process_magazine", [
+    Stage("document", _ocr_pages, deps=["content", "content_type", "req_id"]),
+    Stage("pages", _document_pages, deps=["document"]),
+    Stage("original_text", _join_pages, deps=["pages"]),
+    Stage("tokens", lambda text: executor.run("tokenizer", _tok.tokenize, text), deps=["original_text"]),
+    Stage(
+        "translated_text",
+        lambda text, lang, on_segment: trans_service.translate_document(
+            text, src_lang="ja", tgt_lang=lang, on_segment=on_segment
+        ),
+        deps=["original_text", "target_language", "on_translated_segment"],
+    ),
+    Stage("intent", _predict_top_intent, deps=["original_text"]),
+    Stage("entities", lambda text: executor.run("ner", ner_service.extract, text), deps=["original_text"]),
+    Stage("suggested_actions", _suggest_actions, deps=["original_text", "entities"]),
+])
 
 
 @app.get("/", include_in_schema=False)
@@ -80,17 +218,37 @@ async def health() -> HealthResponse:
     return HealthResponse(status="ok")
 
 
+@app.get("/v1/ready", response_model=ReadyResponse)
+async def ready() -> JSONResponse:
+    resp = ReadyResponse(
+        ready=models.ready,
+        models={name: ModelReadiness(**status) for name, status in models.status().items()},
+    )
+    return JSONResponse(status_code=200 if resp.ready else 503, content=resp.model_dump())
+
+
+def _memory_report() -> tuple[Dict[str, int], Dict[str, Dict[str, int]]]:
+    # Reads /proc smaps_rollup for this worker and its siblings; kept off the event loop.
+    workers = {str(pid): process_memory(pid) for pid in worker_pids()} if models.preloaded else {}
+    return process_memory(), workers
+
+
 @app.get("/v1/status", response_model=StatusResponse)
 async def status() -> StatusResponse:
     uptime = time.time() - _start_time
+    version = VersionInfo(**{f"{name}_model": v for name, v in models.versions().items()})
+    memory, workers_memory = await executor.run("io", _memory_report)
     return StatusResponse(
         status="ok",
         uptime_seconds=uptime,
         model_versions={
-            "translation": _version.translation_model,
-            "intent": _version.intent_model,
-            "ner": _version.ner_model,
+            "translation": version.translation_model,
+            "intent": version.intent_model,
+            "ner": version.ner_model,
         },
+        pid=os.getpid(),
+        memory=memory,
+        workers_memory=workers_memory,
     )
 
 
@@ -99,14 +257,20 @@ async def translate(req: TranslateRequest) -> TranslateResponse:
     text = req.text.strip()
     if not text:
         raise HTTPException(status_code=400, detail="Empty text")
-    ckey = cache.hash_key(["translate", req.src_lang, req.tgt_lang, text])
-    cached = cache.get_json(ckey)
+    # One instance for key and work alike, so a swap mid-request cannot file new output under the old version.
+    model = trans_service.current  # type: ignore
+    ckey = cache.hash_key(["translate", model.version, req.src_lang, req.tgt_lang, text])
+    cached = await _cached(ckey, TranslateResponse)
     if cached:
-        return TranslateResponse(**cached)
-    translated = trans_service.translate(text, req.src_lang, req.tgt_lang)
-    resp = TranslateResponse(translated_text=translated)
-    cache.set_json(ckey, resp.model_dump())
-    return resp
+        return cached
+
+    async def compute() -> TranslateResponse:
+        translated = await model.translate_document(text, req.src_lang, req.tgt_lang)
+        resp = TranslateResponse(translated_text=translated)
+        await cache.set_json(ckey, resp.model_dump())
+        return resp
+
+    return await coalescer.do(ckey, compute, recheck=partial(_cached, ckey, TranslateResponse))
 
 
 @app.post("/v1/predict-intent", response_model=PredictIntentResponse, dependencies=[Depends(rate_limit_dep)])
@@ -114,7 +278,7 @@ async def predict_intent(req: PredictIntentRequest) -> PredictIntentResponse:
     text = req.text.strip()
     if not text:
         raise HTTPException(status_code=400, detail="Empty text")
-    scores = intent_service.predict(text, top_k=req.top_k)
+    scores = await executor.run("intent", intent_service.predict, text, top_k=req.top_k)
     return PredictIntentResponse(scores=[IntentScore(label=l, score=s) for l, s in scores])
 
 
@@ -123,10 +287,168 @@ async def extract_entities(req: ExtractEntitiesRequest) -> ExtractEntitiesRespon
     text = req.text.strip()
     if not text:
         raise HTTPException(status_code=400, detail="Empty text")
-    ents = ner_service.extract(text)
+    ents = await executor.run("ner", ner_service.extract, text)
     return ExtractEntitiesResponse(entities=ents)
 
 
+def _batch_error(exc: BaseException) -> str:
+    if isinstance(exc, ExecutorSaturated):
+        return "Server busy, retry later"
+    logger.error("batch_item_failed", error=str(exc))
+    return "Internal server error"
+
+
+async def _run_batch(
+    texts: List[str],
+    key_parts: List[str],
+    compute: Callable[[List[str]], Awaitable[List[Any]]],
+) -> List[tuple[Optional[Any], Optional[str]]]:
+    """Resolve each text from the cache in bulk and compute only the distinct misses.
+
+    ``compute`` returns one JSON-serializable value per input, or an exception
+    for items that failed. Results come back in input order as (value, error).
+    """
+    if len(texts) > settings.max_batch_items:
+        raise HTTPException(status_code=413, detail=f"At most {settings.max_batch_items} items per batch")
+    stripped = [t.strip() for t in texts]
+    keys = [cache.hash_key(key_parts + [t]) for t in stripped]
+    outcomes: List[tuple[Optional[Any], Optional[str]]] = [(None, "Empty text")] * len(texts)
+    lookup = [i for i, t in enumerate(stripped) if t]
+    hits = await cache.get_many([keys[i] for i in lookup])
+    pending: dict[str, List[int]] = {}
+    for i, hit in zip(lookup, hits):
+        if hit is not None:
+            outcomes[i] = (hit, None)
+        else:
+            pending.setdefault(stripped[i], []).append(i)
+    if pending:
+        misses = list(pending)
+        try:
+            values = await compute(misses)
+        except Exception as exc:
+            values = [exc] * len(misses)
+        fresh = []
+        for text, value in zip(misses, values):
+            if isinstance(value, BaseException):
+                outcome = (None, _batch_error(value))
+            else:
+                outcome = (value, None)
+                fresh.append((keys[pending[text][0]], value))
+            for i in pending[text]:
+                outcomes[i] = outcome
+        await cache.set_many(fresh)
+    return outcomes
+
+
+@app.post("/v1/translate:batch", response_model=TranslateBatchResponse, dependencies=[Depends(rate_limit_dep)])
+async def translate_batch(req: TranslateBatchRequest) -> TranslateBatchResponse:
+    model = trans_service.current  # type: ignore
+
+    async def compute(texts: List[str]) -> List[Any]:
+        translated = await asyncio.gather(
+            *(model.translate_document(t, req.src_lang, req.tgt_lang) for t in texts),
+            return_exceptions=True,
+        )
+        # Same payload shape as /v1/translate so both endpoints share cache entries.
+        return [t if isinstance(t, BaseException) else {"translated_text": t} for t in translated]
+
+    outcomes = await _run_batch(req.texts, ["translate", model.version, req.src_lang, req.tgt_lang], compute)
+    return TranslateBatchResponse(results=[
+        TranslateBatchItem(translated_text=value["translated_text"]) if error is None else TranslateBatchItem(error=error)
+        for value, error in outcomes
+    ])
+
+
+@app.post("/v1/predict-intent:batch", response_model=PredictIntentBatchResponse, dependencies=[Depends(rate_limit_dep)])
+async def predict_intent_batch(req: PredictIntentBatchRequest) -> PredictIntentBatchResponse:
+    model = intent_service.current  # type: ignore
+
+    async def compute(texts: List[str]) -> List[Any]:
+        return await executor.run("intent", model.predict_batch, texts, top_k=req.top_k)
+
+    outcomes = await _run_batch(req.texts, ["intent", model.version, str(req.top_k)], compute)
+    return PredictIntentBatchResponse(results=[
+        PredictIntentBatchItem(scores=[IntentScore(label=l, score=s) for l, s in value])
+        if error is None else PredictIntentBatchItem(error=error)
+        for value, error in outcomes
+    ])
+
+
+@app.post("/v1/extract-entities:batch", response_model=ExtractEntitiesBatchResponse, dependencies=[Depends(rate_limit_dep)])
+async def extract_entities_batch(req: ExtractEntitiesBatchRequest) -> ExtractEntitiesBatchResponse:
+    model = ner_service.current  # type: ignore
+
+    async def compute(texts: List[str]) -> List[Any]:
+        batches = await executor.run("ner", model.extract_batch, texts)
+        return [[e.model_dump() for e in ents] for ents in batches]
+
+    outcomes = await _run_batch(req.texts, ["entities", model.version], compute)
+    return ExtractEntitiesBatchResponse(results=[
+        ExtractEntitiesBatchItem(entities=value) if error is None else ExtractEntitiesBatchItem(error=error)
+        for value, error in outcomes
+    ])
+
+
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
+
+def _ingest_upload(f: BinaryIO, limit: int) -> tuple[memoryview, str]:
+    # One pass over the spooled upload: each chunk is read straight into the
+    # final buffer, then hashed and streamed to clamd from that same memory.
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    if size > limit:
+        raise HTTPException(status_code=413, detail="Payload too large")
+    view = memoryview(bytearray(size))
+    digest = hashlib.sha256()
+    pos = 0
+    with scanner.stream() as scan:
+        while pos < size:
+            n = f.readinto(view[pos:pos + UPLOAD_CHUNK_BYTES])
+            if not n:
+                break
+            chunk = view[pos:pos + n]
+            digest.update(chunk)
+            scan.feed(chunk)
+            pos += n
+    return view[:pos], digest.hexdigest()
+
+
+async def _read_upload(file: UploadFile) -> tuple[memoryview, str]:
+    if file.content_type not in {"image/jpeg", "image/png", "application/pdf"}:
+        raise HTTPException(status_code=415, detail="Unsupported media type")
+    try:
+        return await executor.run("io", _ingest_upload, file.file, settings.max_upload_mb * 1024 * 1024)
+    except (HTTPException, ExecutorSaturated):
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Infected file detected")
+    except OSError as exc:  # includes ScanError: clamd could not give a verdict
+        logger.error("av_scan_failed", error=str(exc))
+        raise HTTPException(status_code=503, detail="Upload scanning unavailable", headers={"Retry-After": "5"})
+
+
+async def _finish_magazine(req_id: str, ckey: str, result, start: float) -> ProcessMagazineResponse:
+    elapsed_ms = int((time.time() - start) * 1000)
+    logger.info("process_magazine_stages", id=req_id, total_ms=elapsed_ms, **result.timings_ms)
+    resp = ProcessMagazineResponse(
+        id=req_id,
+        original_text=result["original_text"],
+        translated_text=result["translated_text"],
+        tokens=result["tokens"],
+        intent=result["intent"],
+        entities=result["entities"],
+        suggested_actions=result["suggested_actions"],
+        warnings=_warnings(result),
+        processing_time_ms=elapsed_ms,
+        stage_timings_ms=result.timings_ms,
+        pages=result["pages"],
+    )
+    await cache.set_json(ckey, resp.model_dump())
+    return resp
+
+
 @app.post("/v1/process-magazine", response_model=ProcessMagazineResponse, dependencies=[Depends(rate_limit_dep)])
 async def process_magazine(
     file: UploadFile = File(...),
@@ -134,57 +456,151 @@ async def process_magazine(
     user_id: Optional[str] = Form(default=None),
 ) -> ProcessMagazineResponse:
     start = time.time()
+    content, digest = await _read_upload(file)
+    req_id = await _canonical_id(content, file.content_type, digest[:16])
 
-    if file.content_type not in {"image/jpeg", "image/png", "application/pdf"}:
-        raise HTTPException(status_code=415, detail="Unsupported media type")
-
-    content = await file.read()
-    if len(content) > settings.max_upload_mb * 1024 * 1024:
-        raise HTTPException(status_code=413, detail="Payload too large")
+    ckey = cache.hash_key(["process", target_language, settings.ocr_preset, models.fingerprint(), req_id])
+    cached = await _cached(ckey, ProcessMagazineResponse)
+    cache_lookups("process", int(bool(cached)), int(not cached))
+    if cached:
+        return cached
+
+    async def compute() -> ProcessMagazineResponse:
+        result = await magazine_pipeline.run(
+            {
+                "content": content,
+                "content_type": file.content_type,
+                "req_id": req_id,
+                "target_language": target_language,
+                "on_translated_segment": None,
+            }
+        )
+        return await _finish_magazine(req_id, ckey, result, start)
+
+    return await coalescer.do(ckey, compute, recheck=partial(_cached, ckey, ProcessMagazineResponse))
+
+
+# Stage results are emitted as they complete; clients render partial output early.
+_STREAMED_STAGES = ("pages", "original_text", "tokens", "intent", "entities", "translated_text", "suggested_actions")
+
+
+async def _stream_magazine(
+    content: memoryview,
+    content_type: str,
+    req_id: str,
+    ckey: str,
+    target_language: str,
+    start: float,
+    sse: bool,
+):
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_result(stage: str, value) -> None:
+        if stage in _STREAMED_STAGES:
+            queue.put_nowait((stage, value))
+
+    async def on_translated_segment(index: int, total: int, text: str) -> None:
+        queue.put_nowait(("translation_segment", {"index": index, "total": total, "text": text}))
+
+    async def run() -> ProcessMagazineResponse:
+        try:
+            result = await magazine_pipeline.run(
+                {
+                    "content": content,
+                    "content_type": content_type,
+                    "req_id": req_id,
+                    "target_language": target_language,
+                    "on_translated_segment": on_translated_segment,
+                },
+                on_result=on_result,
+            )
+            resp = await _finish_magazine(req_id, ckey, result, start)
+            queue.put_nowait((
+                "done",
+                {
+                    "id": resp.id,
+                    "warnings": resp.warnings,
+                    "processing_time_ms": resp.processing_time_ms,
+                    "stage_timings_ms": resp.stage_timings_ms,
+                },
+            ))
+            return resp
+        except ExecutorSaturated as exc:
+            queue.put_nowait(("error", {"detail": "Server busy, retry later", "retry_after": exc.retry_after}))
+            raise
+        except InvalidPdf as exc:
+            queue.put_nowait(("error", {"detail": str(exc)}))
+            raise
+        except Exception as exc:
+            logger.error("process_magazine_stream_failed", id=req_id, error=str(exc))
+            queue.put_nowait(("error", {"detail": "Internal server error"}))
+            raise
+        finally:
+            queue.put_nowait(None)
+
+    # Registered so duplicate uploads join this computation instead of starting their own.
+    task = coalescer.register(ckey, run())
     try:
-        scanner.scan_bytes(content)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Infected file detected")
+        yield encode_event("id", {"id": req_id}, sse)
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield encode_event(item[0], item[1], sse)
+    finally:
+        # Client went away: stop the remaining stages unless others are waiting on them.
+        if not task.done() and not coalescer.waiters(ckey):
+            task.cancel()
+
+
+def _stream_cached(cached: dict, sse: bool):
+    yield encode_event("id", {"id": cached["id"]}, sse)
+    for stage in _STREAMED_STAGES:
+        if stage in cached:
+            yield encode_event(stage, cached[stage], sse)
+    yield encode_event(
+        "done",
+        {
+            "id": cached["id"],
+            "warnings": cached.get("warnings", []),
+            "processing_time_ms": cached.get("processing_time_ms", 0),
+            "stage_timings_ms": cached.get("stage_timings_ms", {}),
+        },
+        sse,
+    )
 
-    req_id = hashlib.sha256(content).hexdigest()[:16]
 
-    ckey = cache.hash_key(["process", target_language, req_id])
-    cached = cache.get_json(ckey)
+@app.post("/v1/process-magazine:stream", dependencies=[Depends(rate_limit_dep)])
+async def process_magazine_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    target_language: str = Form(default="en"),
+    user_id: Optional[str] = Form(default=None),
+) -> StreamingResponse:
+    start = time.time()
+    sse = wants_sse(request.headers.get("accept", ""))
+    media_type = SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE
+    content, digest = await _read_upload(file)
+    req_id = await _canonical_id(content, file.content_type, digest[:16])
+
+    ckey = cache.hash_key(["process", target_language, settings.ocr_preset, models.fingerprint(), req_id])
+    cached = await cache.get_json(ckey)
+    cache_lookups("process", int(bool(cached)), int(not cached))
+    inflight = None if cached else coalescer.get(ckey)
+    if inflight is not None:
+        cached = (await coalescer.join(ckey, inflight)).model_dump()
     if cached:
-        return ProcessMagazineResponse(**cached)
-
-    original_text = ocr_service.extract_text(content)
-    tokens = _tok.tokenize(original_text)
-    translated = trans_service.translate(original_text, src_lang="ja", tgt_lang=target_language)
-    intent_scores = intent_service.predict(original_text, top_k=1)
-    top_intent = IntentScore(label=intent_scores[0][0], score=round(intent_scores[0][1], 2))
-    entities = ner_service.extract(original_text)
+        return StreamingResponse(_stream_cached(cached, sse), media_type=media_type)
+    return StreamingResponse(
+        _stream_magazine(content, file.content_type, req_id, ckey, target_language, start, sse),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    actions = []
-    if entities:
-        query = original_text[:120]
-        actions.append(
-            SuggestedAction(
-                action="search_online",
-                label="Search this product online",
-                payload={"query": query},
-            )
-        )
 
-    elapsed_ms = int((time.time() - start) * 1000)
-    resp = ProcessMagazineResponse(
-        id=req_id,
-        original_text=original_text,
-        translated_text=translated,
-        tokens=tokens,
-        intent=top_intent,
-        entities=entities,
-        suggested_actions=actions,
-        warnings=[],
-        processing_time_ms=elapsed_ms,
-    )
-    cache.set_json(ckey, resp.model_dump())
-    return resp
+def _write_upload(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
 
 
 @app.post("/v1/upload-corpus", response_model=UploadCorpusResponse, dependencies=[Depends(rate_limit_dep)])
@@ -192,8 +608,17 @@ async def upload_corpus(
     req: UploadCorpusRequest,
     user=Depends(get_current_user),
 ) -> UploadCorpusResponse:
-    dataset = req.dataset_name
-    job_id = hashlib.sha256(f"{dataset}:{user.get('sub','')}:{time.time()}".encode()).hexdigest()[:16]
+    if len(req.content) > settings.max_upload_mb * 1024 * 1024:
+        raise HTTPException(status_code=413, detail="Corpus too large")
+    upload = Path(settings.jobs_dir) / "uploads" / f"{req.dataset_name}-{secrets.token_hex(4)}.{req.format}"
+    await executor.run("io", _write_upload, upload, req.content)
+    params = {
+        "format": req.format,
+        "upload": str(upload),
+        "corpus": str(Path(settings.corpus_dir) / f"{req.dataset_name}.jsonl"),
+        "submitted_by": user.get("sub", ""),
+    }
+    job_id = await executor.run("io", jobs.submit, "ingest", req.dataset_name, params)
     return UploadCorpusResponse(job_id=job_id)
 
 
@@ -202,10 +627,76 @@ async def trigger_train(
     req: TrainTriggerRequest,
     admin=Depends(require_admin),
 ) -> TrainTriggerResponse:
-    job_id = hashlib.sha256(f"train:{req.task}:{admin.get('sub','')}:{time.time()}".encode()).hexdigest()[:16]
+    corpus = Path(settings.corpus_dir) / f"{req.dataset_name or req.task}.jsonl"
+    if not corpus.exists():
+        raise HTTPException(status_code=404, detail="Dataset not found; upload it with /v1/upload-corpus")
+    params = {"data": str(corpus), "epochs": req.epochs, "activate": req.activate, "submitted_by": admin.get("sub", "")}
+    job_id = await executor.run("io", jobs.submit, "train", req.task, params)
     return TrainTriggerResponse(job_id=job_id)
 
 
+@app.get("/v1/jobs/{job_id}", response_model=JobStatusResponse)
+async def job_status(job_id: str, user=Depends(get_current_user)) -> JobStatusResponse:
+    job = await executor.run("io", job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(job_id=job["id"], **{k: job[k] for k in JobStatusResponse.model_fields if k in job})
+
+
+@app.on_event("startup")
+async def start_redis_health_checks() -> None:
+    redis_pool.start_health_checks()
+
+
+@app.on_event("startup")
+async def load_models() -> None:
+    # Runs in the background so liveness answers at once; /v1/ready gates traffic.
+    models.start()
+
+
+@app.on_event("startup")
+async def open_phash_index() -> None:
+    global phash_index
+    if settings.phash_enabled:
+        phash_index = await asyncio.to_thread(
+            PerceptualIndex,
+            settings.phash_index_path,
+            settings.phash_algorithm,
+            settings.phash_max_distance,
+            settings.phash_index_max_entries,
+            settings.data_retention_hours * 3600,
+        )
+
+
+@app.on_event("startup")
+async def resume_training_jobs() -> None:
+    await asyncio.to_thread(jobs.start)
+
+
+@app.on_event("shutdown")
+async def shutdown_executor() -> None:
+    executor.shutdown()
+    jobs.shutdown()
+    cache.close()
+    await redis_pool.close()
+
+
+@app.exception_handler(ExecutorSaturated)
+async def saturated_exception_handler(request, exc: ExecutorSaturated):  # type: ignore
+    logger.warning("inference_stage_saturated", stage=exc.stage)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(InvalidPdf)
+async def invalid_pdf_exception_handler(request, exc: InvalidPdf):  # type: ignore
+    logger.info("invalid_pdf_upload", error=str(exc))
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+
 @app.exception_handler(Exception)
 async def default_exception_handler(request, exc):  # type: ignore
     logger.error("unhandled_exception", error=str(exc))
@@ -0,0 +1,63 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """Rejects oversized request bodies before they are buffered.
+
+    A declared Content-Length over the limit is refused without reading the
+    body; otherwise bytes are counted as they stream in and the request is
+    aborted with 413 as soon as the limit is crossed.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: tuple[str, ...]) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        too_large = JSONResponse(status_code=413, content={"detail": "Payload too large"})
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        tripped = False  # the limit was crossed; the app's own reply is replaced by the 413
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, tripped
+            if tripped:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI turns errors while parsing the body into a 400, and
+                    # BaseHTTPMiddleware reads outside its handlers, so the 413 is sent from here.
+                    tripped = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            if tripped and not started:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not tripped or started:
+                raise
+        if tripped and not started:
+            await too_large(scope, receive, send)
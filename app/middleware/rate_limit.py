@@ -0,0 +1,16 @@
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp
+from starlette.responses import Response
+
+
+class RateLimitHeadersMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app: ASGIApp) -> None:
+        super().__init__(app)
+
+    async def dispatch(self, request, call_next):  # type: ignore
+        response: Response = await call_next(request)
+        result = getattr(request.state, "rate_limit", None)
+        if result is not None:
+            for name, value in result.headers().items():
+                response.headers.setdefault(name, value)
+        return response
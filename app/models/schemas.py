@@ -23,6 +23,13 @@ class SuggestedAction(BaseModel):
     payload: Dict[str, Any]
 
 
+class PageResult(BaseModel):
+    page: int
+    text: str
+    cached: bool = False
+    timings_ms: Dict[str, int] = Field(default_factory=dict)
+
+
 class ProcessMagazineResponse(BaseModel):
     id: str
     original_text: str
@@ -33,6 +40,8 @@ class ProcessMagazineResponse(BaseModel):
     suggested_actions: List[SuggestedAction]
     warnings: List[str]
     processing_time_ms: int
+    stage_timings_ms: Dict[str, int] = Field(default_factory=dict)
+    pages: List[PageResult] = Field(default_factory=list)
 
 
 class TranslateRequest(BaseModel):
@@ -64,9 +73,55 @@ class ExtractEntitiesResponse(BaseModel):
     entities: List[Entity]
 
 
+class TranslateBatchRequest(BaseModel):
+    texts: List[str] = Field(min_length=1)
+    src_lang: str = Field(default="ja")
+    tgt_lang: str = Field(default="en")
+
+
+class TranslateBatchItem(BaseModel):
+    translated_text: Optional[str] = None
+    error: Optional[str] = None
+
+
+class TranslateBatchResponse(BaseModel):
+    results: List[TranslateBatchItem]
+
+
+class PredictIntentBatchRequest(BaseModel):
+    texts: List[str] = Field(min_length=1)
+    lang: str = Field(default="ja")
+    top_k: int = Field(default=3, ge=1, le=10)
+
+
+class PredictIntentBatchItem(BaseModel):
+    scores: Optional[List[IntentScore]] = None
+    error: Optional[str] = None
+
+
+class PredictIntentBatchResponse(BaseModel):
+    results: List[PredictIntentBatchItem]
+
+
+class ExtractEntitiesBatchRequest(BaseModel):
+    texts: List[str] = Field(min_length=1)
+    lang: str = Field(default="ja")
+
+
+class ExtractEntitiesBatchItem(BaseModel):
+    entities: Optional[List[Entity]] = None
+    error: Optional[str] = None
+
+
+class ExtractEntitiesBatchResponse(BaseModel):
+    results: List[ExtractEntitiesBatchItem]
+
+
 class UploadCorpusRequest(BaseModel):
     format: str = Field(pattern="^(json|csv)$")
-    dataset_name: str
+    dataset_name: str = Field(pattern=r"^[A-Za-z0-9_.-]{1,64}$")
+    # JSON array or JSONL of {"text", "label"} / {"text", "entities"} rows, or CSV with text,label columns
+    content: str = Field(min_length=1)
     notes: Optional[str] = None
 
 
@@ -76,17 +131,52 @@ class UploadCorpusResponse(BaseModel):
 
 class TrainTriggerRequest(BaseModel):
     task: str = Field(pattern="^(intent|ner)$")
+    dataset_name: Optional[str] = Field(default=None, pattern=r"^[A-Za-z0-9_.-]{1,64}$")  # defaults to the task name
+    epochs: Optional[int] = Field(default=None, ge=1, le=100)  # intent only; ner trains in one pass
+    activate: bool = False  # make the trained version live once published
 
 
 class TrainTriggerResponse(BaseModel):
     job_id: str
 
 
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    task: str
+    state: str
+    progress: float
+    message: str
+    artifacts: Dict[str, str] = Field(default_factory=dict)
+    error: Optional[str] = None
+    attempts: int
+    created_at: float
+    updated_at: float
+
+
 class HealthResponse(BaseModel):
     status: str
 
 
+class ModelReadiness(BaseModel):
+    state: str
+    version: str
+    mock: bool = False
+    load_ms: Optional[int] = None
+    warmup_ms: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ReadyResponse(BaseModel):
+    ready: bool
+    models: Dict[str, ModelReadiness]
+
+
 class StatusResponse(BaseModel):
     status: str
     uptime_seconds: float
     model_versions: Dict[str, str]
+    pid: int
+    memory: Dict[str, int] = Field(default_factory=dict)
+    # Keyed by pid; filled in when workers were forked from a preloading master.
+    workers_memory: Dict[str, Dict[str, int]] = Field(default_factory=dict)
@@ -0,0 +1,151 @@
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.utils.logging import logger
+
+
+# (type, start, end, confidence); Entity models are only built from these at the response boundary.
+Span = Tuple[str, int, int, float]
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer.tsv"
+
+# One alternation so prices and URLs come out of a single regex scan.
+PATTERN_RE = re.compile(
+    r"(?P<URL>https?://\S+)"
+    r"|(?P<PRICE>[¥$]\s?\d{1,3}(?:[\,\.]\d{3})*(?:\.\d{2})?)"
+)
+
+
+def _script(ch: str) -> Optional[str]:
+    """The run a character belongs to, for scripts whose words must not be matched mid-run.
+
+    Hiragana is left out: particles and okurigana attach directly to the words
+    around them, so a hiragana neighbour is no sign of a longer word.
+    """
+    if ch.isascii():
+        return "latin" if ch.isalnum() else None
+    if "\u30a1" <= ch <= "\u30fa" or ch == "\u30fc" or "\uff66" <= ch <= "\uff9f":
+        return "katakana"  # including the long-vowel mark and halfwidth forms
+    if "\u4e00" <= ch <= "\u9fff" or "\u3400" <= ch <= "\u4dbf" or ch == "\u3005":
+        return "kanji"
+    return None
+
+
+class Gazetteer:
+    """Aho–Corasick automaton over a term dictionary.
+
+    One left-to-right pass finds every dictionary term in the text, so the
+    cost is linear in the text length plus the number of hits, whatever the
+    dictionary size. Latin terms match case-insensitively. A term only
+    matches where it does not continue a run of the script it starts or ends
+    with (Latin letters and digits, katakana or kanji), so "セール" is not found
+    inside "ベストセラー" nor "京都" inside "東京都".
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, str]], confidence: float = 0.8) -> None:
+        self.confidence = confidence
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (term length, type, script of first char, script of last char) for every term ending here.
+        self._out: List[Tuple[Tuple[int, str, Optional[str], Optional[str]], ...]] = [()]
+        self.size = 0
+        for term, etype in terms:
+            self._add(term.lower(), etype)
+        self._link()
+
+    def _add(self, term: str, etype: str) -> None:
+        if not term:
+            return
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        if not any(out[0] == len(term) for out in self._out[state]):
+            self._out[state] += ((len(term), etype, _script(term[0]), _script(term[-1])),)
+            self.size += 1
+
+    def _link(self) -> None:
+        # Breadth-first, so each state's fail target is finished before its children use it;
+        # outputs are merged along fail links so the scan never walks them.
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def scan(self, text: str) -> List[Span]:
+        folded = text.lower()
+        if len(folded) != len(text):  # a few code points change length when lowered
+            folded = "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+        goto, fail, out = self._goto, self._fail, self._out
+        spans: List[Span] = []
+        state = 0
+        n = len(text)
+        for i, ch in enumerate(folded):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, etype, first, last in out[state]:
+                start, end = i + 1 - length, i + 1
+                if first is not None and start > 0 and _script(text[start - 1]) == first:
+                    continue
+                if last is not None and end < n and _script(text[end]) == last:
+                    continue
+                spans.append((etype, start, end, self.confidence))
+        return spans
+
+    @classmethod
+    def from_tsv(cls, path: Path) -> "Gazetteer":
+        """``term<TAB>TYPE`` per line; blank lines and ``#`` comments are skipped."""
+        terms = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line or line.startswith("#"):
+                    continue
+                term, _, etype = line.partition("\t")
+                terms.append((term.strip(), (etype.strip() or "PRODUCT").upper()))
+        gazetteer = cls(terms)
+        logger.info("gazetteer_loaded", path=str(path), terms=gazetteer.size, states=len(gazetteer._goto))
+        return gazetteer
+
+
+def select_spans(spans: List[Span]) -> List[Span]:
+    """Leftmost-longest non-overlapping spans, in text order."""
+    chosen: List[Span] = []
+    last_end = -1
+    for span in sorted(spans, key=lambda s: (s[1], s[1] - s[2])):
+        if span[1] >= last_end:
+            chosen.append(span)
+            last_end = span[2]
+    return chosen
+
+
+def merge_spans(primary: List[Span], secondary: List[Span]) -> List[Span]:
+    """All of ``primary`` plus the ``secondary`` spans that overlap none of it."""
+    taken = sorted((s[1], s[2]) for s in primary)
+    extra = [s for s in secondary if not any(start < s[2] and s[1] < end for start, end in taken)]
+    return sorted(primary + extra, key=lambda s: s[1])
+
+
+class EntityMatcher:
+    """Regex patterns and the gazetteer combined into one span list per text."""
+
+    def __init__(self, gazetteer: Gazetteer) -> None:
+        self.gazetteer = gazetteer
+
+    def match(self, text: str) -> List[Span]:
+        spans: List[Span] = [(m.lastgroup, m.start(), m.end(), 0.9) for m in PATTERN_RE.finditer(text)]  # type: ignore
+        # Overlap resolution drops dictionary hits inside a URL or price.
+        return select_spans(spans + self.gazetteer.scan(text))
@@ -1,29 +1,128 @@
-from typing import List
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
 from app.core.config import settings
+from app.services.model_registry import ManagedModel
+from app.utils.instrument import cache_lookups, measure, text_size
+from app.utils.logging import logger
+from app.utils.onnx_runtime import create_session, load_config, model_dir, onnx_enabled, resolve_model
+
+try:
+    from transformers import AutoTokenizer  # type: ignore
+except Exception:  # pragma: no cover
+    AutoTokenizer = None  # type: ignore
+
+try:
+    import numpy as np  # type: ignore
+    from app.services.intent_linear import LinearIntentModel, top_k as rank_top_k
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+    LinearIntentModel = None  # type: ignore
 
 
 INTENT_LABELS = ["product", "recipe", "event", "advertisement", "article"]
 
+Ranking = List[tuple[str, float]]
+
+# Keyword fallback when no model is available; scores follow INTENT_LABELS order.
+_EVENT_WORDS = ("イベント", "開催", "ticket", "event")
+
 
-class IntentService:
-    def __init__(self) -> None:
+def _heuristic_scores(text: str) -> List[float]:
+    product, recipe, event, advertisement, article = 0.2, 0.1, 0.1, 0.2, 0.1
+    if "¥" in text or "$" in text:
+        product += 0.4
+        advertisement += 0.2
+    if any(k in text for k in _EVENT_WORDS):
+        event += 0.4
+    return [product, recipe, event, advertisement, article]
+
+
+class IntentService(ManagedModel):
+    def __init__(self, source: Optional[Path] = None) -> None:
+        super().__init__(source, settings.intent_model)
         self.mock = settings.use_mock_mode
-        # Placeholder for model; for now mock scoring
-
-    def predict(self, text: str, top_k: int = 3) -> List[tuple[str, float]]:
-        # Simple heuristic mock: if price symbol present => product/advertisement
-        scores = []
-        base = {
-            "product": 0.2,
-            "recipe": 0.1,
-            "event": 0.1,
-            "advertisement": 0.2,
-            "article": 0.1,
-        }
-        if "¥" in text or "$" in text:
-            base["product"] += 0.4
-            base["advertisement"] += 0.2
-        if any(k in text for k in ["イベント", "開催", "ticket", "event"]):
-            base["event"] += 0.4
-        ranked = sorted(base.items(), key=lambda x: x[1], reverse=True)
-        return ranked[: max(1, min(top_k, len(ranked)))]
+        self.session = None
+        self.tokenizer = None
+        self.linear: Optional["LinearIntentModel"] = None
+        self.labels = list(INTENT_LABELS)
+        # Score rows keyed by text digest, so repeated texts skip featurizing and scoring.
+        self._results: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._results_max = max(0, settings.intent_cache_size)
+
+    def load(self) -> None:
+        exported = resolve_model("intent", base=self.source)
+        if not self.mock and onnx_enabled() and AutoTokenizer is not None and exported.exists():
+            try:
+                self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir("intent", self.source)))
+                self.session = create_session(exported)
+                id2label = load_config("intent", self.source).get("id2label", {})
+                self.labels = [id2label.get(str(i), str(i)) for i in range(len(id2label))] or self.labels
+            except Exception as exc:  # pragma: no cover
+                logger.warning("intent_onnx_init_failed", error=str(exc))
+                self.session = None
+        if not self.mock and self.session is None and LinearIntentModel is not None:
+            path = self.source / "intent_linear.npz" if self.source is not None else Path(settings.intent_linear_path)
+            if path.exists():
+                try:
+                    self.linear = LinearIntentModel.load(path)
+                    self.labels = self.linear.labels
+                    logger.info("intent_linear_loaded", path=str(path), dim=self.linear.dim, labels=len(self.labels))
+                except Exception as exc:  # pragma: no cover
+                    logger.warning("intent_linear_init_failed", error=str(exc))
+        self.mock = self.session is None and self.linear is None  # heuristics stand in for the model
+
+    def warmup(self, texts: List[str]) -> None:
+        self.predict_batch(texts)
+
+    def fork_safe(self) -> bool:
+        return not onnx_enabled()
+
+    def _probs_onnx(self, texts: List[str]) -> "np.ndarray":
+        enc = self.tokenizer(texts, return_tensors="np", padding=True, truncation=True, max_length=256)
+        feeds = {i.name: enc[i.name].astype(np.int64) for i in self.session.get_inputs() if i.name in enc}
+        logits = self.session.run(None, feeds)[0]
+        probs = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        probs /= probs.sum(axis=-1, keepdims=True)
+        return probs
+
+    def _scores(self, texts: List[str]) -> "np.ndarray":
+        if self.session is not None:
+            return self._probs_onnx(texts)
+        if self.linear is not None:
+            return self.linear.predict_proba(texts)
+        return np.asarray([_heuristic_scores(text) for text in texts])
+
+    def predict_batch(self, texts: List[str], top_k: int = 3) -> List[Ranking]:
+        self.ensure_loaded()
+        if np is None:
+            ranked = [sorted(zip(self.labels, _heuristic_scores(t)), key=lambda x: x[1], reverse=True) for t in texts]
+            return [r[: max(1, top_k)] for r in ranked]
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        rows: List[Optional["np.ndarray"]] = [None] * len(texts)
+        with self._results_lock:
+            for i, key in enumerate(keys):
+                hit = self._results.get(key)
+                if hit is not None:
+                    self._results.move_to_end(key)
+                    rows[i] = hit
+        misses = [i for i, row in enumerate(rows) if row is None]
+        cache_lookups("intent_scores", len(texts) - len(misses), len(misses))
+        if misses:
+            # All misses are scored together: one featurize pass and one matrix product.
+            batch = [texts[i] for i in misses]
+            with measure("intent", self.model_label, "chars", text_size(batch)):
+                fresh = self._scores(batch)
+            with self._results_lock:
+                for i, row in zip(misses, fresh):
+                    rows[i] = row
+                    self._results[keys[i]] = row
+                while len(self._results) > self._results_max:
+                    self._results.popitem(last=False)
+        return rank_top_k(np.vstack(rows), self.labels, top_k)
+
+    def predict(self, text: str, top_k: int = 3) -> Ranking:
+        return self.predict_batch([text], top_k)[0]
@@ -0,0 +1,92 @@
+import zlib
+from pathlib import Path
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+
+# Sparse batch: feature ids, weights, and the offset where each text's features start.
+Features = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def featurize(texts: Sequence[str], dim: int, ngram_min: int = 1, ngram_max: int = 3) -> Features:
+    """Hashed character n-grams, L2-normalised per text.
+
+    crc32 rather than ``hash()`` so ids are stable across processes and
+    between training and serving. Character n-grams need no tokenizer and
+    cover Japanese and Latin text alike.
+    """
+    ids: List[int] = []
+    weights: List[float] = []
+    offsets = np.zeros(len(texts), dtype=np.int64)
+    for row, text in enumerate(texts):
+        offsets[row] = len(ids)
+        text = f"\x02{text.lower()}\x03"
+        start = len(ids)
+        for n in range(ngram_min, ngram_max + 1):
+            for i in range(len(text) - n + 1):
+                ids.append(zlib.crc32(text[i:i + n].encode()) % dim)
+        count = len(ids) - start
+        weights.extend([count ** -0.5] * count)  # the \x02/\x03 markers guarantee count > 0
+    return np.asarray(ids, dtype=np.int64), np.asarray(weights, dtype=np.float32), offsets
+
+
+class LinearIntentModel:
+    """Multinomial logistic regression over hashed n-grams, scored with NumPy."""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: List[str], ngram_min: int, ngram_max: int) -> None:
+        self.weights = weights  # (dim, classes)
+        self.bias = bias  # (classes,)
+        self.labels = labels
+        self.dim = weights.shape[0]
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+
+    def logits(self, features: Features) -> np.ndarray:
+        ids, vals, offsets = features
+        rows = len(offsets)
+        out = np.tile(self.bias, (rows, 1))
+        if len(ids):
+            # X @ W for a CSR batch: gather the touched weight rows once, then sum each text's segment.
+            contrib = self.weights[ids] * vals[:, None]
+            nonempty = np.flatnonzero(np.diff(np.append(offsets, len(ids))) > 0)
+            out[nonempty] += np.add.reduceat(contrib, offsets[nonempty], axis=0)
+        return out
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        logits = self.logits(featurize(texts, self.dim, self.ngram_min, self.ngram_max))
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        return probs
+
+    def save(self, path: Union[str, Path]) -> None:
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=self.bias,
+            labels=np.asarray(self.labels),
+            ngram=np.asarray([self.ngram_min, self.ngram_max]),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LinearIntentModel":
+        with np.load(path, allow_pickle=False) as data:
+            ngram = data["ngram"]
+            return cls(
+                data["weights"].astype(np.float32),
+                data["bias"].astype(np.float32),
+                [str(label) for label in data["labels"]],
+                int(ngram[0]),
+                int(ngram[1]),
+            )
+
+
+def top_k(probs: np.ndarray, labels: List[str], k: int) -> List[List[tuple[str, float]]]:
+    k = max(1, min(k, probs.shape[1]))
+    # argpartition finds the k best in linear time; only those k get sorted.
+    part = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+    picked = np.take_along_axis(probs, part, axis=1)
+    # Ties keep label order, matching a stable full sort.
+    order = np.take_along_axis(part, np.lexsort((part, -picked), axis=1), axis=1)
+    return [[(labels[i], float(row[i])) for i in idx] for row, idx in zip(probs, order)]
@@ -0,0 +1,360 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.utils.logging import logger
+from app.utils.metrics import TRAINING_JOBS
+
+try:
+    import resource  # type: ignore
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+
+# queued -> running -> exporting -> succeeded | failed
+ACTIVE_STATES = ("running", "exporting")
+
+# Steps per job kind, in order; finished steps are recorded so a resumed job skips them.
+STEPS = {"ingest": ("ingest",), "train": ("train", "export", "publish")}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    task TEXT NOT NULL,
+    state TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    params TEXT NOT NULL DEFAULT '{}',
+    artifacts TEXT NOT NULL DEFAULT '{}',
+    steps TEXT NOT NULL DEFAULT '[]',
+    error TEXT,
+    owner INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+_JSON_COLUMNS = ("params", "artifacts", "steps")
+
+
+class JobStore:
+    """Job state in SQLite, shared by the API process and the training processes.
+
+    Every process opens its own connection (reopened after a fork); WAL mode
+    lets progress writes from a training process proceed while the API reads.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _execute(self, sql: str, args: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._db().execute(sql, args)
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            job[column] = json.loads(job[column])
+        return job
+
+    def create(self, kind: str, task: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        job_id = secrets.token_hex(8)
+        self._execute(
+            "INSERT INTO jobs (id, kind, task, state, params, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, kind, task, json.dumps(params), now, now),
+        )
+        return self.get(job_id)  # type: ignore
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        fields = {k: json.dumps(v) if k in _JSON_COLUMNS else v for k, v in fields.items()}
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def claim(self, job_id: str, owner: int) -> bool:
+        # Conditional update, so when several API workers start at once only one runs each job.
+        # The training process replaces ``owner`` with its own pid once it starts.
+        cur = self._execute(
+            "UPDATE jobs SET state = 'running', owner = ?, attempts = attempts + 1, error = NULL, updated_at = ? "
+            "WHERE id = ? AND state = 'queued'",
+            (owner, time.time(), job_id),
+        )
+        return cur.rowcount == 1
+
+    def requeue(self, job_id: str, owner: Optional[int]) -> bool:
+        cur = self._execute(
+            "UPDATE jobs SET state = 'queued', updated_at = ? WHERE id = ? AND state IN (?, ?) AND owner IS ?",
+            (time.time(), job_id, *ACTIVE_STATES, owner),
+        )
+        return cur.rowcount == 1
+
+    def by_state(self, *states: str) -> List[Dict[str, Any]]:
+        marks = ", ".join("?" for _ in states)
+        rows = self._execute(f"SELECT * FROM jobs WHERE state IN ({marks}) ORDER BY created_at", states).fetchall()
+        return [self._row(row) for row in rows]  # type: ignore
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid or pid == os.getpid():  # our own pid in the table belongs to a previous incarnation
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _limit_resources(memory_mb: int, nice: int, cpus: List[int]) -> None:
+    """Pool initializer: keep training from competing with the serving process."""
+    if nice:
+        os.nice(nice)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    threads = str(len(cpus) if cpus else 1)
+    # Numeric libraries are imported after this runs, so they size their thread pools from these.
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = threads
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+# --- steps, executed inside the training process ---------------------------------------------
+
+
+def _job_dir(job: Dict[str, Any]) -> Path:
+    return Path(settings.jobs_dir) / job["id"]
+
+
+def _ingest(job: Dict[str, Any], progress: Callable[[float, str], None]) -> Dict[str, str]:
+    from app.training.preprocess import normalize_currency
+
+    params = job["params"]
+    raw = Path(params["upload"]).read_text(encoding="utf-8")
+    if params["format"] == "csv":
+        items = list(csv.DictReader(io.StringIO(raw)))
+    elif raw.lstrip().startswith("["):
+        items = json.loads(raw)
+    else:
+        items = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    target = Path(params["corpus"])
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    kept = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for item in items:
+            text = item.get("text")
+            if not text or not ("label" in item or "entities" in item):
+                continue
+            # Entity offsets index the original text, so only unannotated text is normalised.
+            row = {"text": text, "entities": item["entities"]} if "entities" in item else {
+                "text": normalize_currency(text),
+                "label": item["label"],
+            }
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            kept += 1
+    if not kept:
+        raise ValueError("corpus has no rows with text and a label or entities")
+    os.replace(tmp, target)
+    progress(1.0, f"{kept} of {len(items)} rows kept")
+    return {"corpus": str(target)}
+
+
+def _train(job: Dict[str, Any], progress: Callable[[float, str], None]) -> Dict[str, str]:
+    params = job["params"]
+    out = _job_dir(job) / job["task"]
+    options: Dict[str, Any] = {}
+    if job["task"] == "intent":
+        from app.training.train_intent import run_training
+        if params.get("epochs"):
+            options["epochs"] = params["epochs"]
+    else:
+        # The gazetteer is built in one pass; there are no epochs to set.
+        from app.training.train_ner import run_training  # type: ignore
+    metrics = run_training(params["data"], str(out), progress=progress, **options)
+    logger.info("training_finished", job_id=job["id"], task=job["task"], metrics=metrics)
+    return {"model": str(out), "metrics": str(out / "metrics.json")}
+
+
+def _export(job: Dict[str, Any], progress: Callable[[float, str], None]) -> Dict[str, str]:
+    source = Path(job["artifacts"]["model"])
+    if not (source / "config.json").exists():
+        # The linear intent model and the gazetteer are served as-is; only transformers
+        # checkpoints have a graph for export_onnx.py to trace.
+        progress(1.0, "export skipped: artifact is not a transformers checkpoint")
+        return {}
+    from app.training.export_onnx import export_classifier
+
+    target = _job_dir(job) / "onnx" / job["task"]
+    export_classifier(str(source), target, token_level=job["task"] == "ner", int8=settings.onnx_quantized)
+    progress(1.0, "exported")
+    return {"onnx": str(target)}
+
+
+def _publish(job: Dict[str, Any], progress: Callable[[float, str], None]) -> Dict[str, str]:
+    from app.services.model_store import model_store
+
+    # The ONNX export, when there is one, is what the service loads; it carries its own tokenizer.
+    source = Path(job["artifacts"].get("onnx") or job["artifacts"]["model"])
+    version = f"{time.strftime('%Y%m%d_%H%M%S')}_{job['id'][:6]}"
+    activate = bool(job["params"].get("activate"))
+    model_store.publish(job["task"], source, version, activate=activate)
+    progress(1.0, f"published {job['task']} {version}" + (" (active)" if activate else ""))
+    return {"version": version}
+
+
+_STEP_FNS = {"ingest": _ingest, "train": _train, "export": _export, "publish": _publish}
+
+
+def run_job(db_path: str, job_id: str) -> None:
+    """Entry point in the training process; runs the job's unfinished steps in order."""
+    store = JobStore(db_path)
+    job = store.get(job_id)
+    if job is None:
+        return
+    # Liveness is judged by this process, not the API worker that dispatched it: a job whose
+    # API worker restarted keeps running here and must not be picked up a second time.
+    store.update(job_id, owner=os.getpid())
+    steps = STEPS[job["kind"]]
+    span = 1.0 / len(steps)
+    try:
+        for n, step in enumerate(steps):
+            if step in job["steps"]:
+                continue
+            base = n * span
+
+            def progress(fraction: float, message: str, base: float = base) -> None:
+                store.update(job_id, progress=round(base + fraction * span, 4), message=message)
+
+            store.update(job_id, state="exporting" if step == "export" else "running", progress=base, message=step)
+            job["artifacts"].update(_STEP_FNS[step](job, progress))
+            job["steps"].append(step)
+            store.update(job_id, artifacts=job["artifacts"], steps=job["steps"])
+        store.update(job_id, state="succeeded", progress=1.0)
+    except MemoryError:
+        store.update(job_id, state="failed", error=f"exceeded the {settings.training_memory_mb} MB training memory limit")
+    except Exception as exc:
+        store.update(job_id, state="failed", error=f"{type(exc).__name__}: {exc}")
+
+
+class JobRunner:
+    """Runs training jobs on a dedicated process pool, recording their state in a JobStore.
+
+    Workers are niced, pinned to ``training_cpus`` and memory-capped, and each
+    serves a single job, so memory a job allocated is returned when it ends.
+    """
+
+    def __init__(self, store: JobStore) -> None:
+        self.store = store
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()  # submits arrive on several "io" threads
+
+    def _get_pool(self, broken: Optional[ProcessPoolExecutor] = None) -> ProcessPoolExecutor:
+        """The shared pool, created on first use; ``broken`` is replaced unless another thread already did."""
+        with self._pool_lock:
+            if self._pool is None or self._pool is broken:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=max(1, settings.training_workers),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_limit_resources,
+                    initargs=(settings.training_memory_mb, settings.training_nice, list(settings.training_cpus)),
+                    max_tasks_per_child=1,
+                )
+                logger.info("training_pool_started", workers=settings.training_workers)
+            return self._pool
+
+    def submit(self, kind: str, task: str, params: Dict[str, Any]) -> str:
+        job = self.store.create(kind, task, params)
+        self._dispatch(job["id"], kind)
+        return job["id"]
+
+    def _dispatch(self, job_id: str, kind: str) -> None:
+        if not self.store.claim(job_id, os.getpid()):
+            return
+        pool = self._get_pool()
+        try:
+            future = pool.submit(run_job, self.store.path, job_id)
+        except BrokenProcessPool:
+            # A worker died hard (e.g. OOM-killed) and took the pool with it; start a fresh one.
+            future = self._get_pool(broken=pool).submit(run_job, self.store.path, job_id)
+        future.add_done_callback(partial(self._finished, job_id, kind))
+        logger.info("training_job_dispatched", job_id=job_id, kind=kind)
+
+    def _finished(self, job_id: str, kind: str, future: Future) -> None:
+        if future.cancelled():  # shut down before it started; start() picks it up again
+            return
+        exc = future.exception()
+        job = self.store.get(job_id)
+        if isinstance(exc, BrokenProcessPool) and job is not None:
+            # A training process died hard (e.g. OOM-killed), taking the pool and every job on it
+            # down; completed steps and checkpoints are on disk, so run the job again from there.
+            if job["attempts"] < settings.training_max_attempts and self.store.requeue(job_id, job["owner"]):
+                logger.warning("training_job_retried", job_id=job_id, attempt=job["attempts"], error=str(exc))
+                self._dispatch(job_id, kind)
+                return
+        if exc is not None:
+            # The process died before it could record anything, or kept dying.
+            self.store.update(job_id, state="failed", error=f"{type(exc).__name__}: {exc}")
+            job = self.store.get(job_id)
+        state = job["state"] if job else "failed"
+        TRAINING_JOBS.labels(kind, state).inc()
+        logger.info("training_job_finished", job_id=job_id, kind=kind, state=state)
+
+    def start(self) -> None:
+        """Resume jobs whose owning process is gone, then dispatch anything still queued."""
+        try:
+            for job in self.store.by_state(*ACTIVE_STATES):
+                if not _pid_alive(job["owner"]) and self.store.requeue(job["id"], job["owner"]):
+                    logger.info("training_job_resumed", job_id=job["id"], steps=job["steps"])
+            for job in self.store.by_state("queued"):
+                self._dispatch(job["id"], job["kind"])
+        except sqlite3.Error as exc:
+            logger.warning("training_jobs_unavailable", error=str(exc))
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            # Running jobs are left "running" and their processes keep going; the next start()
+            # only resumes jobs whose training process is gone.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+job_store = JobStore(settings.jobs_db_path)
+jobs = JobRunner(job_store)
@@ -0,0 +1,225 @@
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, TypeVar
+from app.core.config import settings
+from app.services.model_store import ModelStore
+from app.utils.logging import logger
+from app.utils.metrics import MODEL_SWAPS
+
+
+class ManagedModel(ABC):
+    """A service whose weights load in ``load()`` rather than in ``__init__``.
+
+    Constructing a service is cheap; ``ensure_loaded()`` loads it exactly once,
+    from whichever thread or worker process gets there first. Entry points
+    call it so lazily registered models load on first use.
+
+    ``source`` is a version directory from the model store; without one the
+    service loads from the paths in settings and reports ``version``.
+    """
+
+    mock: bool = True
+
+    def __init__(self, source: Optional[Path] = None, version: str = "default") -> None:
+        self.source = source
+        self.version = source.name if source is not None else version
+        self._loaded = threading.Event()
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    @property
+    def model_label(self) -> str:
+        """Metric label for this instance: its version, or "mock" while heuristics stand in."""
+        return "mock" if self.mock else self.version
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load weights and sessions; runs once, under the load lock."""
+
+    def warmup(self, texts: List[str]) -> None:
+        """Run one small batch so lazy graph init and allocator growth happen before traffic."""
+
+    def fork_safe(self) -> bool:
+        """Whether loaded state survives fork(); ONNX Runtime sessions do not."""
+        return True
+
+    async def close(self) -> None:
+        """Release anything that would outlive the last request, after this version is swapped out."""
+
+    def ensure_loaded(self) -> None:
+        if self._loaded.is_set():
+            return
+        with self._load_lock:
+            if not self._loaded.is_set():
+                self.load()
+                self._loaded.set()
+
+
+class ModelStatus:
+    __slots__ = ("state", "version", "mock", "load_ms", "warmup_ms", "error")
+
+    def __init__(self, state: str, version: str) -> None:
+        self.state = state  # lazy | pending | loading | loaded | ready | failed
+        self.version = version
+        self.mock = False
+        self.load_ms: Optional[int] = None
+        self.warmup_ms: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+M = TypeVar("M", bound=ManagedModel)
+
+
+class ModelSlot:
+    """Stable handle to a hot-swappable model; attribute access goes to the live version.
+
+    A caller that looked up a method before a swap holds the old instance
+    until it returns, so in-flight requests finish on the model they started on
+    and the old version is freed once the last of them is done.
+    """
+
+    __slots__ = ("current",)
+
+    def __init__(self, model: ManagedModel) -> None:
+        self.current = model
+
+    def __getattr__(self, name: str):  # type: ignore
+        return getattr(self.current, name)
+
+
+class ModelRegistry:
+    """Loads every eager model concurrently at startup, tracks readiness and hot-swaps versions."""
+
+    def __init__(self, store: Optional[ModelStore] = None) -> None:
+        self.store = store
+        self._models: Dict[str, ManagedModel] = {}
+        self._status: Dict[str, ModelStatus] = {}
+        self._slots: Dict[str, ModelSlot] = {}
+        self._rejected: Dict[str, str] = {}  # last version per model that failed to load
+        self._task: Optional[asyncio.Task] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self.preloaded = False
+
+    def register(self, name: str, model: M, lazy: bool = False, versioned: bool = False) -> M:
+        """Track ``model``; a versioned one is returned behind a ModelSlot that follows the store."""
+        self._models[name] = model
+        self._status[name] = ModelStatus("lazy" if lazy else "pending", model.version)
+        if not versioned:
+            return model
+        slot = self._slots[name] = ModelSlot(model)
+        return slot  # type: ignore
+
+    def _load(self, name: str, warm: bool = True) -> None:
+        self._prepare(name, self._models[name], self._status[name], warm)
+
+    def _prepare(self, name: str, model: ManagedModel, status: ModelStatus, warm: bool = True) -> None:
+        preloaded, status.state = status.state == "loaded", "loading"
+        try:
+            if not preloaded:
+                start = time.perf_counter()
+                model.ensure_loaded()
+                status.load_ms = int((time.perf_counter() - start) * 1000)
+            if not warm:
+                status.state, status.mock = "loaded", model.mock
+                return
+            if settings.warmup_enabled and not model.mock:
+                start = time.perf_counter()
+                model.warmup(settings.warmup_texts)
+                status.warmup_ms = int((time.perf_counter() - start) * 1000)
+        except Exception as exc:
+            status.state, status.error = "failed", str(exc)
+            logger.error("model_load_failed", model=name, error=str(exc))
+            return
+        status.state, status.mock = "ready", model.mock
+        logger.info(
+            "model_ready",
+            model=name,
+            version=model.version,
+            mock=model.mock,
+            load_ms=status.load_ms,
+            warmup_ms=status.warmup_ms,
+        )
+
+    def preload(self) -> None:
+        """Load fork-safe eager models in a preforking master so workers share their pages.
+
+        Warmup is left to each worker: running inference before fork can leave
+        the child's OpenMP pool unusable.
+        """
+        eager = [n for n, s in self._status.items() if s.state == "pending" and self._models[n].fork_safe()]
+        with ThreadPoolExecutor(max_workers=max(1, len(eager)), thread_name_prefix="model-preload") as pool:
+            list(pool.map(lambda name: self._load(name, warm=False), eager))
+        self.preloaded = True
+
+    async def load_all(self) -> None:
+        eager = [name for name, status in self._status.items() if status.state in ("pending", "loaded")]
+        # Loading is mostly file I/O and native init that releases the GIL, so threads overlap well.
+        await asyncio.gather(*(asyncio.to_thread(self._load, name) for name in eager))
+
+    async def _swap(self, name: str, version: str) -> None:
+        old, old_status = self._models[name], self._status[name]
+        candidate = type(old)(self.store.path(name, version))  # type: ignore
+        status = ModelStatus("pending", version)
+        if old_status.state == "lazy" and not old.loaded:
+            status.state = "lazy"  # never used yet, so the new version can load on first use too
+        else:
+            # Load and warm off the event loop while the old version keeps serving.
+            await asyncio.to_thread(self._prepare, name, candidate, status)
+            if status.state != "ready":
+                self._rejected[name] = version
+                MODEL_SWAPS.labels(name, "failed").inc()
+                logger.error("model_swap_failed", model=name, version=version, serving=old.version, error=status.error)
+                return
+        self._models[name], self._status[name] = candidate, status
+        self._slots[name].current = candidate  # one reference assignment: callers see old or new, never a mix
+        MODEL_SWAPS.labels(name, "swapped").inc()
+        logger.info("model_swapped", model=name, old=old.version, new=version)
+        await old.close()
+
+    async def watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            for name, slot in list(self._slots.items()):
+                try:
+                    version = await asyncio.to_thread(self.store.current, name)  # type: ignore
+                    if version and version != slot.current.version and version != self._rejected.get(name):
+                        await self._swap(name, version)
+                except Exception as exc:
+                    logger.error("model_watch_failed", model=name, error=str(exc))
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._task = loop.create_task(self.load_all())
+        interval = settings.registry_watch_interval_seconds
+        if self._watcher is None and self.store is not None and self._slots and interval > 0:
+            self._watcher = loop.create_task(self.watch(interval))
+
+    def versions(self) -> Dict[str, str]:
+        """Live version of each versioned model."""
+        return {name: slot.current.version for name, slot in self._slots.items()}
+
+    def fingerprint(self) -> str:
+        """Cache-key component that changes whenever any versioned model is swapped."""
+        return ";".join(f"{name}={version}" for name, version in sorted(self.versions().items()))
+
+    def status(self) -> Dict[str, dict]:
+        for name, status in self._status.items():
+            if status.state == "lazy" and self._models[name].loaded:
+                status.state, status.mock = "ready", self._models[name].mock
+        return {name: status.as_dict() for name, status in self._status.items()}
+
+    @property
+    def ready(self) -> bool:
+        # Lazy models never gate readiness; they load on first use.
+        return all(s.state in ("ready", "lazy") for s in self._status.values())
@@ -0,0 +1,96 @@
+import argparse
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional
+from app.core.config import settings
+
+
+class ModelStore:
+    """Versioned model artifacts on local disk.
+
+    Layout is ``<root>/<name>/<version>/`` with a ``CURRENT`` file per model
+    naming the live version. Version directories are immutable once
+    published; deploying or rolling back only rewrites ``CURRENT``, which the
+    model registry watches.
+    """
+
+    POINTER = "CURRENT"
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def path(self, name: str, version: str) -> Path:
+        return self.root / name / version
+
+    def versions(self, name: str) -> List[str]:
+        base = self.root / name
+        if not base.is_dir():
+            return []
+        return sorted(p.name for p in base.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+    def current(self, name: str) -> Optional[str]:
+        try:
+            version = (self.root / name / self.POINTER).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return version if version and self.path(name, version).is_dir() else None
+
+    def source(self, name: str) -> Optional[Path]:
+        version = self.current(name)
+        return self.path(name, version) if version else None
+
+    def activate(self, name: str, version: str) -> None:
+        if not self.path(name, version).is_dir():
+            raise FileNotFoundError(f"{name} has no version {version}")
+        pointer = self.root / name / self.POINTER
+        tmp = pointer.with_name(f".{self.POINTER}.{os.getpid()}")
+        tmp.write_text(version + "\n", encoding="utf-8")
+        os.replace(tmp, pointer)  # readers see the old version or the new one, never a partial write
+
+    def publish(self, name: str, source: Path, version: Optional[str] = None, activate: bool = False) -> str:
+        """Copy ``source`` in as a new version; the rename makes it appear complete or not at all."""
+        version = version or time.strftime("%Y%m%d_%H%M%S")
+        target = self.path(name, version)
+        if target.exists():
+            raise FileExistsError(f"{name} version {version} already exists")
+        staging = target.with_name(f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(source, staging)
+        os.replace(staging, target)
+        if activate:
+            self.activate(name, version)
+        return version
+
+
+model_store = ModelStore(settings.registry_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Publish, list and activate model versions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ls = sub.add_parser("list")
+    ls.add_argument("name")
+    pub = sub.add_parser("publish")
+    pub.add_argument("name")
+    pub.add_argument("source")
+    pub.add_argument("--version", default=None)
+    pub.add_argument("--activate", action="store_true")
+    act = sub.add_parser("activate", help="Make a version live; also how to roll back")
+    act.add_argument("name")
+    act.add_argument("version")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = model_store.current(args.name)
+        for version in model_store.versions(args.name):
+            print(("* " if version == current else "  ") + version)
+    elif args.command == "publish":
+        print(model_store.publish(args.name, Path(args.source), args.version, args.activate))
+    else:
+        model_store.activate(args.name, args.version)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,145 @@
 import re
-from typing import List
+from pathlib import Path
+from typing import List, Optional
 from app.core.config import settings
 from app.models.schemas import Entity
+from app.services.gazetteer import DEFAULT_PATH, EntityMatcher, Gazetteer, Span, merge_spans
+from app.services.model_registry import ManagedModel
+from app.utils.instrument import measure, text_size
+from app.utils.logging import logger
+from app.utils.onnx_runtime import create_session, load_config, model_dir, onnx_enabled, resolve_model
 
+try:
+    from transformers import AutoTokenizer  # type: ignore
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    AutoTokenizer = None  # type: ignore
+    np = None  # type: ignore
 
-PRICE_RE = re.compile(r"([¥$]\s?\d{1,3}(?:[\,\.]\d{3})*(?:\.\d{2})?)")
-URL_RE = re.compile(r"https?://\S+")
+
+def to_entities(text: str, spans: List[Span]) -> List[Entity]:
+    entities = []
+    for etype, start, end, confidence in spans:
+        surface = text[start:end]
+        if etype != "PRICE":
+            entities.append(Entity(type=etype, text=surface, start=start, end=end, confidence=confidence))
+            continue
+        try:
+            value: Optional[float] = float(re.sub(r"[^0-9.]", "", surface.replace(",", "")))
+        except ValueError:
+            value = None
+        entities.append(
+            Entity(type="PRICE", text=surface, start=start, end=end, confidence=confidence, value=value, currency="JPY" if "¥" in surface else None)
+        )
+    return entities
 
 
-class NerService:
-    def __init__(self) -> None:
+class NerService(ManagedModel):
+    def __init__(self, source: Optional[Path] = None) -> None:
+        super().__init__(source, settings.ner_model)
         self.mock = settings.use_mock_mode
+        self.session = None
+        self.tokenizer = None
+        self.labels: List[str] = []
+        self.matcher: Optional[EntityMatcher] = None
 
-    def extract(self, text: str) -> List[Entity]:
-        entities: List[Entity] = []
-        for m in PRICE_RE.finditer(text):
-            price_text = m.group(1)
-            value = None
-            digits = re.sub(r"[^0-9.]", "", price_text.replace(",", ""))
+    def load(self) -> None:
+        gazetteer = self.source / "gazetteer.tsv" if self.source is not None else None
+        if gazetteer is None or not gazetteer.exists():
+            gazetteer = Path(settings.gazetteer_path or DEFAULT_PATH)
+        self.matcher = EntityMatcher(Gazetteer.from_tsv(gazetteer))
+        exported = resolve_model("ner", base=self.source)
+        if not self.mock and onnx_enabled() and AutoTokenizer is not None and exported.exists():
             try:
-                value = float(digits)
-            except Exception:
-                value = None
-            entities.append(
-                Entity(type="PRICE", text=price_text, start=m.start(), end=m.end(), confidence=0.9, value=value, currency="JPY" if "¥" in price_text else None)
-            )
-        for m in URL_RE.finditer(text):
-            entities.append(Entity(type="URL", text=m.group(0), start=m.start(), end=m.end(), confidence=0.9))
-        # naive guessing garnae: first noun-like token heuristic in mock
-        if "スカート" in text:
-            idx = text.find("スカート")
-            entities.append(Entity(type="PRODUCT", text="スカート", start=idx, end=idx + 4, confidence=0.8))
-        if "skirt" in text.lower():
-            idx = text.lower().find("skirt")
-            entities.append(Entity(type="PRODUCT", text=text[idx:idx+5], start=idx, end=idx + 5, confidence=0.8))
-        return entities
+                self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir("ner", self.source)))
+                self.session = create_session(exported)
+                id2label = load_config("ner", self.source).get("id2label", {})
+                self.labels = [id2label.get(str(i), "O") for i in range(len(id2label))]
+            except Exception as exc:  # pragma: no cover
+                logger.warning("ner_onnx_init_failed", error=str(exc))
+                self.session = None
+        self.mock = self.session is None  # heuristics stand in for the model
+
+    def warmup(self, texts: List[str]) -> None:
+        self.extract_batch(texts)
+
+    def fork_safe(self) -> bool:
+        return not onnx_enabled()
+
+    def _token_spans(self, text: str, ids: List[int]) -> List[Optional[tuple[int, int]]]:
+        # The Japanese BERT tokenizer is a slow tokenizer without offset mappings,
+        # so recover character spans by walking the wordpieces through the text.
+        spans: List[Optional[tuple[int, int]]] = []
+        cursor = 0
+        special = set(self.tokenizer.all_special_ids)
+        for tok_id, piece in zip(ids, self.tokenizer.convert_ids_to_tokens(ids)):
+            if tok_id in special:
+                spans.append(None)
+                continue
+            piece = piece[2:] if piece.startswith("##") else piece
+            idx = text.find(piece, cursor)
+            if idx < 0:
+                spans.append(None)
+                continue
+            spans.append((idx, idx + len(piece)))
+            cursor = idx + len(piece)
+        return spans
+
+    def _extract_onnx(self, texts: List[str]) -> List[List[Span]]:
+        enc = self.tokenizer(texts, return_tensors="np", padding=True, truncation=True, max_length=512)
+        feeds = {i.name: enc[i.name].astype(np.int64) for i in self.session.get_inputs() if i.name in enc}
+        logits = self.session.run(None, feeds)[0]
+        probs = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        probs /= probs.sum(axis=-1, keepdims=True)
+        results = []
+        for row, text, ids, mask in zip(probs, texts, enc["input_ids"], enc["attention_mask"]):
+            length = int(mask.sum())
+            results.append(self._decode_onnx(text, ids[:length].tolist(), row[:length]))
+        return results
+
+    def _decode_onnx(self, text: str, ids: List[int], probs: "np.ndarray") -> List[Span]:
+        best = probs.argmax(axis=-1)
+        spans = self._token_spans(text, ids)
+        entities: List[Span] = []
+        current: Optional[list] = None  # [type, start, end, confidences]
+        for span, label_id, row in zip(spans, best, probs):
+            label = self.labels[label_id] if label_id < len(self.labels) else "O"
+            if span is None or label == "O":
+                if current is not None:
+                    entities.append(self._to_span(current))
+                    current = None
+                continue
+            prefix, _, etype = label.partition("-")
+            etype = etype or prefix
+            if current is not None and prefix == "I" and current[0] == etype:
+                current[2] = span[1]
+                current[3].append(float(row[label_id]))
+                continue
+            if current is not None:
+                entities.append(self._to_span(current))
+            current = [etype, span[0], span[1], [float(row[label_id])]]
+        if current is not None:
+            entities.append(self._to_span(current))
+        return [e for e in entities if e[0] not in {"PRICE", "URL"}]
+
+    @staticmethod
+    def _to_span(current: list) -> Span:
+        etype, start, end, confs = current
+        return (etype, start, end, round(sum(confs) / len(confs), 3))
+
+    def spans_batch(self, texts: List[str]) -> List[List[Span]]:
+        self.ensure_loaded()
+        with measure("ner.rules", "gazetteer", "chars", text_size(texts)):
+            matched = [self.matcher.match(text) for text in texts]  # type: ignore
+        if self.session is None:
+            return matched
+        with measure("ner", self.model_label, "chars", text_size(texts)):
+            predicted = self._extract_onnx(texts)
+        # Prices, URLs and dictionary hits stay rule-driven; the model fills in open-class entities around them.
+        return [merge_spans(rules, model) for rules, model in zip(matched, predicted)]
+
+    def extract_batch(self, texts: List[str]) -> List[List[Entity]]:
+        return [to_entities(text, spans) for text, spans in zip(texts, self.spans_batch(texts))]
+
+    def extract(self, text: str) -> List[Entity]:
+        return self.extract_batch([text])[0]
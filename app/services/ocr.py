@@ -1,33 +1,118 @@
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
 from app.core.config import settings
+from app.services.model_registry import ManagedModel
+from app.services.ocr_preprocess import PRESETS, OcrPreset, StepTimer, decode, preprocess
+from app.services.pdf import render_page
+from app.utils.instrument import measure
 from app.utils.logging import logger
+from app.utils.metrics import OCR_STEP_SECONDS
 
 try:
     import easyocr  # type: ignore
 except Exception:  # pragma: no cover
     easyocr = None
 
+try:
+    from PIL import Image  # type: ignore
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    Image = None  # type: ignore
+    np = None  # type: ignore
+
+
+MOCK_OCR_TEXT = "青いスカート ¥5,000。今週のセール！"
 
-class OcrService:
-    def __init__(self) -> None:
+OcrResult = Tuple[str, Dict[str, int]]
+
+
+class OcrService(ManagedModel):
+    def __init__(self, preset: Optional[str] = None) -> None:
+        super().__init__()
+        name = preset or settings.ocr_preset
+        if name not in PRESETS:
+            logger.warning("ocr_unknown_preset", preset=name)
+            name = "balanced"
+        self.preset: OcrPreset = PRESETS[name]
+        self.batch_size = max(1, settings.ocr_recognize_batch_size)
         self.mock = settings.use_mock_mode
         self.reader: Optional["easyocr.Reader"] = None
+
+    def load(self) -> None:
         if not self.mock and easyocr is not None:
             try:
                 self.reader = easyocr.Reader(["ja", "en"], gpu=False)
-                logger.info("easyocr_initialized", langs=["ja", "en"]) 
+                logger.info("easyocr_initialized", langs=["ja", "en"], preset=self.preset.name)
             except Exception as exc:  # pragma: no cover
                 logger.warning("easyocr_init_failed", error=str(exc))
                 self.mock = True
         else:
+            self.mock = True
             logger.info("ocr_mock_mode_enabled")
 
-    def extract_text(self, image_bytes: bytes) -> str:
+    def warmup(self, texts: List[str]) -> None:
+        self.reader.readtext(np.full((64, 256), 255, dtype=np.uint8), detail=0)
+
+    def extract_text(self, image_bytes: Union[bytes, memoryview]) -> str:
+        return self.read_image(image_bytes)[0]
+
+    def read_image(self, image_bytes: Union[bytes, memoryview]) -> OcrResult:
+        self.ensure_loaded()
+        if self.mock or self.reader is None:
+            return MOCK_OCR_TEXT, {}
+        timer = StepTimer()
+        try:
+            # Decoded once, straight from a zero-copy view of the upload buffer.
+            image = decode(image_bytes, self.preset.long_edge)
+            image.load()
+        except Exception as exc:
+            logger.warning("ocr_decode_failed", size=len(image_bytes), error=str(exc))
+            return "", {}
+        timer.lap("decode")
+        with measure("ocr", self.model_label, "pixels", image.width * image.height):
+            return self._recognize(image, timer)
+
+    def read_pdf_page(self, path: str, page_no: int, dpi: int) -> OcrResult:
+        self.ensure_loaded()
         if self.mock or self.reader is None:
-            return "青いスカート ¥5,000。今週のセール！"
+            return MOCK_OCR_TEXT, {}
+        # Rasterized lazily, one page per call, inside the worker that OCRs it.
+        timer = StepTimer()
         try:
-            result = self.reader.readtext(image_bytes, detail=0, paragraph=True)
-            return "\n".join(result)
+            image = Image.fromarray(render_page(path, page_no, dpi))
+        except Exception as exc:  # pragma: no cover
+            logger.error("pdf_render_failed", page=page_no, error=str(exc))
+            return "", {}
+        timer.lap("render")
+        with measure("ocr", self.model_label, "pixels", image.width * image.height):
+            return self._recognize(image, timer)
+
+    def _recognize(self, image: "Image.Image", timer: StepTimer) -> OcrResult:
+        try:
+            gray = preprocess(image, self.preset, timer)
+            if self.preset.detect_regions:
+                horizontal, free = self.reader.detect(gray)
+                timer.lap("detect")
+                if not horizontal[0] and not free[0]:
+                    return "", self._observe(timer)
+                # Only the detected boxes are cropped and recognized, several per forward pass.
+                lines = self.reader.recognize(
+                    gray,
+                    horizontal_list=horizontal[0],
+                    free_list=free[0],
+                    detail=0,
+                    paragraph=True,
+                    batch_size=self.batch_size,
+                )
+            else:
+                lines = self.reader.readtext(gray, detail=0, paragraph=True, batch_size=self.batch_size)
+            timer.lap("recognize")
+            return "\n".join(lines), self._observe(timer)
         except Exception as exc:  # pragma: no cover
             logger.error("ocr_failed", error=str(exc))
-            return ""
+            return "", self._observe(timer)
+
+    @staticmethod
+    def _observe(timer: StepTimer) -> Dict[str, int]:
+        for step, ms in timer.timings_ms.items():
+            OCR_STEP_SECONDS.labels(step).observe(ms / 1000)
+        return timer.timings_ms
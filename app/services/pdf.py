@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import List, Tuple, Union
+from app.core.config import settings
+from app.models.schemas import PageResult
+from app.utils.cache import cache
+from app.utils.executor import executor
+from app.utils.instrument import cache_lookups
+from app.utils.logging import logger
+
+try:
+    import fitz  # type: ignore  # PyMuPDF
+except Exception:  # pragma: no cover
+    fitz = None  # type: ignore
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+
+class InvalidPdf(ValueError):
+    """The upload is not a PDF that can be read, or has no pages."""
+
+
+def page_digests(path: str, max_pages: int) -> Tuple[List[str], int]:
+    """Digests of the first ``max_pages`` pages, and the document's page count."""
+    # Hash what a page is made of (content stream, images, geometry) without rasterizing it.
+    digests = []
+    try:
+        with fitz.open(path) as doc:
+            total = len(doc)
+            for page in doc.pages(0, min(total, max_pages)):
+                h = hashlib.sha256()
+                h.update(f"{page.rect}|{page.rotation}".encode())
+                h.update(page.read_contents())
+                for image in page.get_images(full=True):
+                    h.update(doc.xref_stream_raw(image[0]) or b"")
+                digests.append(h.hexdigest())
+    except Exception as exc:
+        raise InvalidPdf(f"Unreadable PDF: {exc}") from exc
+    if not total:
+        raise InvalidPdf("PDF has no pages")
+    return digests, total
+
+
+def render_page(path: str, page_no: int, dpi: int) -> "np.ndarray":
+    with fitz.open(path) as doc:
+        # OCR only needs luminance, so rasterize a single channel.
+        pix = doc[page_no].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+
+def _spill(content: Union[bytes, memoryview]) -> str:
+    # Workers open the document by path, so page jobs don't each pickle the whole PDF.
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+class PdfService:
+    def __init__(self, ocr_service) -> None:  # type: ignore
+        self.ocr = ocr_service
+        self.dpi = settings.pdf_dpi
+        self.max_pages = settings.pdf_max_pages
+        if fitz is None:
+            logger.warning("pdf_support_disabled", reason="PyMuPDF not installed")
+
+    async def extract_pages(self, content: Union[bytes, memoryview]) -> Tuple[List[PageResult], int]:
+        """OCR'd pages, at most ``pdf_max_pages`` of them, and the document's page count."""
+        if fitz is None:
+            text, timings = await executor.run("ocr", self.ocr.read_image, content)
+            return [PageResult(page=1, text=text, timings_ms=timings)], 1
+        path = await executor.run("io", _spill, content)
+        try:
+            digests, total = await executor.run("io", page_digests, path, self.max_pages)
+            keys = [cache.hash_key(["pdf_page", str(self.dpi), self.ocr.preset.name, digest]) for digest in digests]
+            hits = await cache.get_many(keys)
+            found = sum(isinstance(hit, str) for hit in hits)
+            cache_lookups("pdf_page", found, len(hits) - found)
+
+            async def ocr_page(page_no: int) -> PageResult:
+                if isinstance(hits[page_no], str):
+                    return PageResult(page=page_no + 1, text=hits[page_no], cached=True)
+                text, timings = await executor.run("pdf", self.ocr.read_pdf_page, path, page_no, self.dpi)
+                return PageResult(page=page_no + 1, text=text, timings_ms=timings)
+
+            # Pages rasterize and OCR in parallel across the pdf process pool.
+            pages = await asyncio.gather(*(ocr_page(i) for i in range(len(digests))))
+            await cache.set_many([(keys[p.page - 1], p.text) for p in pages if not p.cached])
+            if total > len(digests):
+                logger.info("pdf_truncated", pages=total, processed=len(digests))
+            return list(pages), total
+        finally:
+            await executor.run("io", os.unlink, path)
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from app.utils.instrument import span
+from app.utils.metrics import PIPELINE_STAGE_SECONDS
+
+
+StageFn = Callable[..., Awaitable[Any]]
+ResultCallback = Callable[[str, Any], Awaitable[None]]
+
+
+class Stage:
+    def __init__(self, name: str, fn: StageFn, deps: Iterable[str] = ()) -> None:
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+class PipelineResult:
+    def __init__(self, values: Dict[str, Any], timings_ms: Dict[str, int]) -> None:
+        self.values = values
+        self.timings_ms = timings_ms
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+
+class StagePipeline:
+    """Runs stages as soon as their dependencies resolve.
+
+    Each stage receives its dependencies' values positionally, in the order
+    listed in ``deps``. Dependencies may name other stages or run inputs.
+    """
+
+    def __init__(self, name: str, stages: List[Stage]) -> None:
+        self.name = name
+        self.stages = self._toposort(stages)
+
+    @staticmethod
+    def _toposort(stages: List[Stage]) -> List[Stage]:
+        by_name = {stage.name: stage for stage in stages}
+        if len(by_name) != len(stages):
+            raise ValueError("Duplicate stage names")
+        ordered: List[Stage] = []
+        state: Dict[str, int] = {}
+
+        def visit(stage: Stage) -> None:
+            mark = state.get(stage.name)
+            if mark == 2:
+                return
+            if mark == 1:
+                raise ValueError(f"Cycle through stage {stage.name!r}")
+            state[stage.name] = 1
+            for dep in stage.deps:
+                if dep in by_name:
+                    visit(by_name[dep])
+            state[stage.name] = 2
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage)
+        return ordered
+
+    async def run(self, inputs: Dict[str, Any], on_result: Optional[ResultCallback] = None) -> PipelineResult:
+        values: Dict[str, Any] = dict(inputs)
+        timings: Dict[str, int] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage) -> Any:
+            args = []
+            for dep in stage.deps:
+                if dep in tasks:
+                    args.append(await tasks[dep])
+                elif dep in values:
+                    args.append(values[dep])
+                else:
+                    raise KeyError(f"Stage {stage.name!r} depends on missing input {dep!r}")
+            start = time.perf_counter()
+            with span(f"{self.name}.{stage.name}"):
+                value = await stage.fn(*args)
+            elapsed = time.perf_counter() - start
+            timings[stage.name] = int(elapsed * 1000)
+            PIPELINE_STAGE_SECONDS.labels(self.name, stage.name).observe(elapsed)
+            values[stage.name] = value
+            if on_result is not None:
+                await on_result(stage.name, value)
+            return value
+
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return PipelineResult(values, timings)
@@ -0,0 +1,43 @@
+import re
+from typing import List
+
+
+# A sentence runs up to a full-width terminator plus any closing brackets/quotes.
+SENTENCE_RE = re.compile(r"[^。！？]+[。！？]*[」』）〕】\"')]*|[。！？]+[」』）〕】\"')]*")
+SOFT_BREAK_RE = re.compile(r"[、，\s]")
+
+
+def _wrap(segment: str, max_chars: int) -> List[str]:
+    pieces: List[str] = []
+    while len(segment) > max_chars:
+        cut = max_chars
+        for m in SOFT_BREAK_RE.finditer(segment, 0, max_chars):
+            cut = m.end()
+        piece, segment = segment[:cut].strip(), segment[cut:].strip()
+        if piece:
+            pieces.append(piece)
+    if segment:
+        pieces.append(segment)
+    return pieces
+
+
+def split_paragraphs(text: str, max_chars: int = 200) -> List[List[str]]:
+    """Split OCR text into paragraphs (lines) of sentence segments.
+
+    Segments longer than ``max_chars`` are wrapped at the last comma or
+    space before the limit so no single input exceeds the model window.
+    """
+    paragraphs: List[List[str]] = []
+    for line in text.splitlines():
+        segments: List[str] = []
+        for m in SENTENCE_RE.finditer(line):
+            sentence = m.group(0).strip()
+            if sentence:
+                segments.extend(_wrap(sentence, max(1, max_chars)))
+        if segments:
+            paragraphs.append(segments)
+    return paragraphs
+
+
+def split_sentences(text: str, max_chars: int = 200) -> List[str]:
+    return [segment for paragraph in split_paragraphs(text, max_chars) for segment in paragraph]
@@ -1,5 +1,12 @@
-from typing import List
+import hashlib
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from app.core.config import settings
+from app.services.model_registry import ManagedModel
+from app.utils.instrument import cache_lookups, measure, text_size
 from app.utils.logging import logger
 
 try:
@@ -8,19 +15,113 @@ except Exception:  # pragma: no cover
     Tagger = None  # type: ignore
 
 
-class TokenizerService:
+# Mock mode splits on script changes, which is close to word boundaries for unspaced Japanese.
+MOCK_TOKEN_RE = re.compile(
+    r"[¥$]?\d[\d,.]*"  # numbers and prices
+    r"|[A-Za-z][A-Za-z'\-]*"  # Latin words
+    r"|[一-鿿々〆ヶ]+"  # kanji
+    r"|[ぁ-ゟ]+"  # hiragana
+    r"|[ァ-ヿー]+"  # katakana
+    r"|\S"  # punctuation and anything else, one character at a time
+)
+
+
+class Tokenization:
+    """Token offsets into the source text, two machine-int arrays per text.
+
+    Surfaces are sliced out only when a caller asks for them, so cached
+    entries cost a few bytes per token instead of a str object each.
+    """
+
+    __slots__ = ("text", "starts", "ends")
+
+    def __init__(self, text: str, starts: "array[int]", ends: "array[int]") -> None:
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def surfaces(self) -> List[str]:
+        text = self.text
+        return [text[s:e] for s, e in zip(self.starts, self.ends)]
+
+
+class TokenizerService(ManagedModel):
     def __init__(self) -> None:
+        super().__init__()
         self.mock = settings.use_mock_mode
+        # fugashi Taggers are not thread-safe; each tokenizer-pool thread gets its own.
+        self._local = threading.local()
+        self._results: "OrderedDict[bytes, Tokenization]" = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._results_max = max(0, settings.tokenizer_cache_size)
+
+    def load(self) -> None:
         if not self.mock and Tagger is not None:
             try:
-                self.tagger = Tagger()
+                self._local.tagger = Tagger()
             except Exception as exc:  # pragma: no cover
                 logger.warning("mecab_init_failed", error=str(exc))
                 self.mock = True
         else:
-            self.tagger = None
+            self.mock = True
+
+    def warmup(self, texts: List[str]) -> None:
+        self.tokenize_batch(texts)
+
+    def _tagger(self) -> "Tagger":
+        tagger = getattr(self._local, "tagger", None)
+        if tagger is None:
+            # The dictionary is mmapped by MeCab, so extra Taggers share its pages.
+            tagger = self._local.tagger = Tagger()
+        return tagger
+
+    def _analyze(self, text: str) -> Tokenization:
+        starts, ends = array("I"), array("I")
+        if self.mock:
+            for m in MOCK_TOKEN_RE.finditer(text):
+                starts.append(m.start())
+                ends.append(m.end())
+            return Tokenization(text, starts, ends)
+        pos = 0
+        for word in self._tagger()(text):
+            surface = word.surface
+            start = text.find(surface, pos)
+            if start < 0:  # MeCab normalised something; keep the offsets monotonic
+                start = pos
+            pos = start + len(surface)
+            starts.append(start)
+            ends.append(pos)
+        return Tokenization(text, starts, ends)
+
+    def tokenize_batch(self, texts: List[str]) -> List[Tokenization]:
+        self.ensure_loaded()
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        results: List[Optional[Tokenization]] = [None] * len(texts)
+        with self._results_lock:
+            for i, key in enumerate(keys):
+                hit = self._results.get(key)
+                if hit is not None:
+                    self._results.move_to_end(key)
+                    results[i] = hit
+        misses = [i for i, hit in enumerate(results) if hit is None]
+        cache_lookups("tokens", len(texts) - len(misses), len(misses))
+        fresh: Dict[bytes, Tokenization] = {}  # also dedupes repeats within the batch
+        if misses:
+            with measure("tokenize", "mock" if self.mock else "mecab", "chars", text_size([texts[i] for i in misses])):
+                for i in misses:
+                    hit = fresh.get(keys[i])
+                    if hit is None:
+                        hit = fresh[keys[i]] = self._analyze(texts[i])
+                    results[i] = hit
+        if fresh and self._results_max:
+            with self._results_lock:
+                self._results.update(fresh)
+                while len(self._results) > self._results_max:
+                    self._results.popitem(last=False)
+        return results  # type: ignore
 
     def tokenize(self, text: str) -> List[str]:
-        if self.mock or self.tagger is None:
-            return text.split()
-        return [word.surface for word in self.tagger(text)]
+        return self.tokenize_batch([text])[0].surfaces()
@@ -1,35 +1,189 @@
-from typing import Optional
+import asyncio
+from functools import partial
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
 from app.core.config import settings
+from app.services.model_registry import ManagedModel
+from app.services.segmenter import split_paragraphs
+from app.utils.batching import MicroBatcher
+from app.utils.cache import cache
+from app.utils.executor import executor
+from app.utils.instrument import cache_lookups, measure
 from app.utils.logging import logger
+from app.utils.onnx_runtime import create_session, load_config, model_dir, onnx_enabled, resolve_model
 
 try:
     from transformers import MarianMTModel, MarianTokenizer  # type: ignore
-    import torch  # type: ignore
 except Exception:  # pragma: no cover
     MarianMTModel = None  # type: ignore
     MarianTokenizer = None  # type: ignore
+
+try:
+    import torch  # type: ignore
+except Exception:  # pragma: no cover
     torch = None  # type: ignore
 
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+
+MOCK_TRANSLATIONS = {
+    "青いスカート ¥5,000。": "Blue skirt ¥5,000.",
+    "今週のセール！": "Sale this week!",
+}
+
+# Called with (segment index, segment count, translated segment).
+SegmentCallback = Callable[[int, int, str], Awaitable[None]]
+
 
-class TranslationService:
-    def __init__(self) -> None:
-        self.mock = settings.use_mock_mode or (MarianMTModel is None)
+class TranslationService(ManagedModel):
+    def __init__(self, source: Optional[Path] = None) -> None:
+        super().__init__(source, settings.translation_model)
+        self.mock = settings.use_mock_mode or (MarianTokenizer is None)
         self.model: Optional["MarianMTModel"] = None
         self.tokenizer: Optional["MarianTokenizer"] = None
+        self.encoder = None
+        self.decoder = None
+        self.generation: dict = {}
+        self._batchers: dict[tuple[str, str], MicroBatcher] = {}
+
+    def load(self) -> None:
         if not self.mock:
             try:
-                self.tokenizer = MarianTokenizer.from_pretrained(settings.translation_model)
-                self.model = MarianMTModel.from_pretrained(settings.translation_model)
+                if onnx_enabled():
+                    self._load_onnx()
+                else:
+                    name = str(self.source) if self.source is not None else settings.translation_model
+                    self.tokenizer = MarianTokenizer.from_pretrained(name)
+                    self.model = MarianMTModel.from_pretrained(name)
             except Exception as exc:  # pragma: no cover
                 logger.warning("translation_model_init_failed", error=str(exc))
                 self.mock = True
         else:
             logger.info("translation_mock_mode_enabled")
 
+    def warmup(self, texts: List[str]) -> None:
+        self.translate_batch(texts)
+
+    def fork_safe(self) -> bool:
+        return not onnx_enabled()
+
+    async def close(self) -> None:
+        await asyncio.gather(*(batcher.close() for batcher in self._batchers.values()))
+
+    def _load_onnx(self) -> None:
+        self.tokenizer = MarianTokenizer.from_pretrained(str(model_dir("translation", self.source)))
+        self.encoder = create_session(resolve_model("translation", "encoder", self.source))
+        self.decoder = create_session(resolve_model("translation", "decoder", self.source))
+        config = load_config("translation", self.source)
+        self.generation = {
+            "start": config["decoder_start_token_id"],
+            "eos": config["eos_token_id"],
+            "pad": config["pad_token_id"],
+        }
+
+    def _generate_onnx(self, texts: List[str]) -> List[str]:
+        # Greedy decoding; the exported decoder has no KV cache so each step re-reads the prefix.
+        enc = self.tokenizer(texts, return_tensors="np", padding=True, truncation=True)
+        input_ids = enc["input_ids"].astype(np.int64)
+        mask = enc["attention_mask"].astype(np.int64)
+        with measure("translate", self.model_label, "tokens", int(mask.sum())):
+            hidden = self.encoder.run(None, {"input_ids": input_ids, "attention_mask": mask})[0]
+            pad, eos = self.generation["pad"], self.generation["eos"]
+            out = np.full((len(texts), 1), self.generation["start"], dtype=np.int64)
+            finished = np.zeros(len(texts), dtype=bool)
+            for _ in range(settings.translation_max_new_tokens):
+                logits = self.decoder.run(
+                    None,
+                    {"decoder_input_ids": out, "encoder_hidden_states": hidden, "encoder_attention_mask": mask},
+                )[0][:, -1, :]
+                logits[:, pad] = -np.inf
+                next_ids = np.where(finished, pad, logits.argmax(axis=-1))
+                out = np.concatenate([out, next_ids[:, None]], axis=1)
+                finished |= next_ids == eos
+                if finished.all():
+                    break
+        return self.tokenizer.batch_decode(out, skip_special_tokens=True)
+
     def translate(self, text: str, src_lang: str = "ja", tgt_lang: str = "en") -> str:
-        if self.mock or self.model is None or self.tokenizer is None:
-            return "Blue skirt ¥5,000. Sale this week!"
-        inputs = self.tokenizer(text, return_tensors="pt", padding=True)
-        with torch.no_grad():  # type: ignore
-            outputs = self.model.generate(**inputs, max_new_tokens=256)
-        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        return self.translate_batch([text], src_lang, tgt_lang)[0]
+
+    def translate_batch(self, texts: List[str], src_lang: str = "ja", tgt_lang: str = "en") -> List[str]:
+        self.ensure_loaded()
+        if self.mock or self.tokenizer is None:
+            return [MOCK_TRANSLATIONS.get(text, text) for text in texts]
+        if self.encoder is not None:
+            return self._generate_onnx(texts)
+        inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+        with measure("translate", self.model_label, "tokens", int(inputs["attention_mask"].sum())), torch.no_grad():  # type: ignore
+            outputs = self.model.generate(**inputs, max_new_tokens=settings.translation_max_new_tokens)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    async def translate_async(self, text: str, src_lang: str = "ja", tgt_lang: str = "en") -> str:
+        return await self._batcher(src_lang, tgt_lang).submit(text)
+
+    def _segment_key(self, segment: str, src_lang: str, tgt_lang: str) -> str:
+        return cache.hash_key(["translate_seg", self.version, src_lang, tgt_lang, segment])
+
+    async def translate_document(
+        self,
+        text: str,
+        src_lang: str = "ja",
+        tgt_lang: str = "en",
+        on_segment: Optional[SegmentCallback] = None,
+    ) -> str:
+        paragraphs = split_paragraphs(text, settings.translation_max_segment_chars)
+        segments = [segment for paragraph in paragraphs for segment in paragraph]
+        if not segments:
+            return ""
+        # Boilerplate repeats within and across pages; translate each distinct segment once.
+        unique = list(dict.fromkeys(segments))
+        keys = [self._segment_key(segment, src_lang, tgt_lang) for segment in unique]
+        cached = await cache.get_many(keys)
+        done: dict[str, str] = {seg: hit for seg, hit in zip(unique, cached) if isinstance(hit, str)}
+        cache_lookups("translate_seg", len(done), len(unique) - len(done))
+
+        positions: dict[str, List[int]] = {}
+        for idx, segment in enumerate(segments):
+            positions.setdefault(segment, []).append(idx)
+
+        async def notify(segment: str) -> None:
+            if on_segment is not None:
+                for idx in positions[segment]:
+                    await on_segment(idx, len(segments), done[segment])
+
+        for segment in unique:
+            if segment in done:
+                await notify(segment)
+
+        async def translate_miss(segment: str) -> None:
+            done[segment] = await self.translate_async(segment, src_lang, tgt_lang)
+            await notify(segment)
+
+        misses = [segment for segment in unique if segment not in done]
+        if misses:
+            # Submitted together so the batcher pads them into as few generate() calls as possible.
+            await asyncio.gather(*(translate_miss(segment) for segment in misses))
+            fresh = [(self._segment_key(seg, src_lang, tgt_lang), done[seg]) for seg in misses]
+            await cache.set_many(fresh)
+
+        return "\n".join(" ".join(done[seg] for seg in paragraph) for paragraph in paragraphs)
+
+    def _batcher(self, src_lang: str, tgt_lang: str) -> MicroBatcher:
+        key = (src_lang, tgt_lang)
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            stage = executor.stage("translation")
+            batcher = MicroBatcher(
+                name=f"translation:{src_lang}-{tgt_lang}",
+                handler=partial(self.translate_batch, src_lang=src_lang, tgt_lang=tgt_lang),
+                max_batch_size=settings.max_batch_size,
+                timeout_ms=settings.batch_timeout_ms,
+                runner=partial(executor.run, "translation"),
+                max_queue=stage.max_pending,
+                retry_after=stage.retry_after,
+            )
+            self._batchers[key] = batcher
+        return batcher
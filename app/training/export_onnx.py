@@ -1,19 +1,158 @@
 import argparse
 from pathlib import Path
+from typing import Optional
+
+import torch
+from transformers import (
+    AutoModelForSequenceClassification,
+    AutoModelForTokenClassification,
+    AutoTokenizer,
+    MarianMTModel,
+    MarianTokenizer,
+)
+
+OPSET = 17
+
+
+class _MarianEncoder(torch.nn.Module):
+    def __init__(self, model: "MarianMTModel") -> None:
+        super().__init__()
+        self.encoder = model.get_encoder()
+
+    def forward(self, input_ids, attention_mask):  # type: ignore
+        return self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+
+class _MarianDecoder(torch.nn.Module):
+    # No past key/values: the runtime re-feeds the whole prefix each step.
+    def __init__(self, model: "MarianMTModel") -> None:
+        super().__init__()
+        self.decoder = model.get_decoder()
+        self.lm_head = model.lm_head
+        self.register_buffer("final_logits_bias", model.final_logits_bias)
+
+    def forward(self, decoder_input_ids, encoder_hidden_states, encoder_attention_mask):  # type: ignore
+        hidden = self.decoder(
+            input_ids=decoder_input_ids,
+            encoder_hidden_states=encoder_hidden_states,
+            encoder_attention_mask=encoder_attention_mask,
+        ).last_hidden_state
+        return self.lm_head(hidden) + self.final_logits_bias
+
+
+def quantize(path: Path) -> Path:
+    from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+
+    target = path.with_name(path.stem + ".int8.onnx")
+    quantize_dynamic(str(path), str(target), weight_type=QuantType.QInt8)
+    print("Quantized:", target)
+    return target
+
+
+def export_translation(model_name: str, out: Path, int8: bool) -> None:
+    out.mkdir(parents=True, exist_ok=True)
+    tokenizer = MarianTokenizer.from_pretrained(model_name)
+    model = MarianMTModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["今週のセール！"], return_tensors="pt", padding=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            _MarianEncoder(model),
+            (sample["input_ids"], sample["attention_mask"]),
+            str(out / "encoder.onnx"),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "src_len"},
+                "attention_mask": {0: "batch", 1: "src_len"},
+                "last_hidden_state": {0: "batch", 1: "src_len"},
+            },
+            opset_version=OPSET,
+        )
+        hidden = model.get_encoder()(**sample).last_hidden_state
+        start = torch.full((1, 1), model.config.decoder_start_token_id, dtype=torch.long)
+        torch.onnx.export(
+            _MarianDecoder(model),
+            (start, hidden, sample["attention_mask"]),
+            str(out / "decoder.onnx"),
+            input_names=["decoder_input_ids", "encoder_hidden_states", "encoder_attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "decoder_input_ids": {0: "batch", 1: "tgt_len"},
+                "encoder_hidden_states": {0: "batch", 1: "src_len"},
+                "encoder_attention_mask": {0: "batch", 1: "src_len"},
+                "logits": {0: "batch", 1: "tgt_len"},
+            },
+            opset_version=OPSET,
+        )
+    tokenizer.save_pretrained(out)
+    model.config.save_pretrained(out)
+    if int8:
+        quantize(out / "encoder.onnx")
+        quantize(out / "decoder.onnx")
+
+
+def export_classifier(model_name: str, out: Path, token_level: bool, int8: bool) -> None:
+    out.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    auto_cls = AutoModelForTokenClassification if token_level else AutoModelForSequenceClassification
+    model = auto_cls.from_pretrained(model_name).eval()
+    sample = tokenizer(["青いスカート ¥5,000"], return_tensors="pt", padding=True)
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    logits_axes = {0: "batch", 1: "seq"} if token_level else {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in names),
+            str(out / "model.onnx"),
+            input_names=names,
+            output_names=["logits"],
+            dynamic_axes={**{n: {0: "batch", 1: "seq"} for n in names}, "logits": logits_axes},
+            opset_version=OPSET,
+        )
+    tokenizer.save_pretrained(out)
+    model.config.save_pretrained(out)
+    if int8:
+        quantize(out / "model.onnx")
+
+
+def _source(model_dir: Path, task: str, override: Optional[str]) -> Optional[str]:
+    if override:
+        return override
+    local = model_dir / task
+    return str(local) if local.exists() else None
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--model_dir", required=True)
+    parser.add_argument("--model_dir", required=True, help="Directory holding translation/, intent/ and ner/ checkpoints")
     parser.add_argument("--out", required=True)
+    parser.add_argument("--translation_model", default=None, help="Override translation checkpoint or hub id")
+    parser.add_argument("--intent_model", default=None, help="Override intent checkpoint or hub id")
+    parser.add_argument("--ner_model", default=None, help="Override NER checkpoint or hub id")
+    parser.add_argument("--tasks", default="translation,intent,ner")
+    parser.add_argument("--quantize", action="store_true", help="Also write dynamic int8 *.int8.onnx files")
     args = parser.parse_args()
 
+    model_dir = Path(args.model_dir)
     out = Path(args.out)
-    out.mkdir(parents=True, exist_ok=True)
-    # Placeholder: create dummy ONNX files
-    (out / "intent.onnx").write_bytes(b"onnx-intent")
-    (out / "ner.onnx").write_bytes(b"onnx-ner")
-    print("Exported ONNX to:", out)
+    tasks = {t.strip() for t in args.tasks.split(",") if t.strip()}
+    exported = []
+    if "translation" in tasks:
+        source = _source(model_dir, "translation", args.translation_model)
+        if source:
+            export_translation(source, out / "translation", args.quantize)
+            exported.append("translation")
+    if "intent" in tasks:
+        source = _source(model_dir, "intent", args.intent_model)
+        if source:
+            export_classifier(source, out / "intent", token_level=False, int8=args.quantize)
+            exported.append("intent")
+    if "ner" in tasks:
+        source = _source(model_dir, "ner", args.ner_model)
+        if source:
+            export_classifier(source, out / "ner", token_level=True, int8=args.quantize)
+            exported.append("ner")
+    print("Exported ONNX to:", out, exported)
 
 
 if __name__ == "__main__":
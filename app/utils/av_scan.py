@@ -1,34 +1,150 @@
 import os
+import queue
+import select
+import socket
+import struct
 from typing import Optional
+from app.utils.logging import logger
 
-try:
-    import clamd  # type: ignore
-except Exception:  # pragma: no cover
-    clamd = None  # type: ignore
+
+class ScanError(OSError):
+    """clamd answered, but with an error (e.g. the INSTREAM size limit) rather than a verdict."""
+
+
+class ClamdSession:
+    """One clamd connection held open with IDSESSION so INSTREAM scans can reuse it."""
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.sendall(b"zIDSESSION\0")
+        self.broken = False
+
+    def is_stale(self) -> bool:
+        # An idle session socket only becomes readable once clamd has closed it.
+        readable, _, _ = select.select([self.sock], [], [], 0)
+        return bool(readable)
+
+    def begin(self) -> None:
+        self.sock.sendall(b"zINSTREAM\0")
+
+    def feed(self, chunk: memoryview) -> None:
+        self.sock.sendall(struct.pack("!L", len(chunk)))
+        self.sock.sendall(chunk)
+
+    def finish(self) -> str:
+        self.sock.sendall(struct.pack("!L", 0))
+        reply = bytearray()
+        while not reply.endswith(b"\0"):
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionError("clamd closed the session")
+            reply.extend(data)
+        # Session replies look like "<request id>: stream: OK".
+        return reply[:-1].decode(errors="replace").split(": ", 1)[-1]
+
+    def close(self) -> None:
+        try:
+            self.sock.sendall(b"zEND\0")
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class ScanStream:
+    def __init__(self, scanner: "AvScanner") -> None:
+        self.scanner = scanner
+        self.session: Optional[ClamdSession] = None
+        if scanner.enabled:
+            self.session = scanner._acquire()
+            try:
+                self._guard(self.session.begin)
+            except OSError:
+                self.abort()
+                raise
+
+    def _guard(self, fn, *args):  # type: ignore
+        try:
+            return fn(*args)
+        except OSError:
+            self.session.broken = True  # type: ignore
+            raise
+
+    def feed(self, chunk: memoryview) -> None:
+        if self.session is not None:
+            self._guard(self.session.feed, chunk)
+
+    def finish(self) -> None:
+        if self.session is None:
+            return
+        session, self.session = self.session, None
+        try:
+            status = self._guard(session.finish)
+            if not status.endswith(("OK", "FOUND")):
+                session.broken = True  # clamd drops the session after an error reply
+        finally:
+            self.scanner._release(session)
+        if status.endswith("FOUND"):
+            raise ValueError("Malware detected")
+        if not status.endswith("OK"):
+            raise ScanError(f"Scan failed: {status}")
+
+    def abort(self) -> None:
+        if self.session is not None:
+            # The stream is half-sent; the connection cannot be reused.
+            self.session.broken = True
+            self.scanner._release(self.session)
+            self.session = None
+
+    def __enter__(self) -> "ScanStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore
+        if exc_type is None:
+            self.finish()
+        else:
+            self.abort()
 
 
 class AvScanner:
     def __init__(self) -> None:
         self.enabled = os.getenv("AV_SCAN_ENABLED", "false").lower() == "true"
-        self.client: Optional["clamd.ClamdNetworkSocket"] = None
-        if self.enabled and clamd is not None:
-            host = os.getenv("CLAMAV_HOST", "localhost")
-            port = int(os.getenv("CLAMAV_PORT", "3310"))
+        self.host = os.getenv("CLAMAV_HOST", "localhost")
+        self.port = int(os.getenv("CLAMAV_PORT", "3310"))
+        self.timeout = float(os.getenv("CLAMAV_TIMEOUT", "10"))
+        self._pool: "queue.LifoQueue[ClamdSession]" = queue.LifoQueue(maxsize=int(os.getenv("CLAMAV_POOL_SIZE", "4")))
+        if self.enabled:
             try:
-                self.client = clamd.ClamdNetworkSocket(host=host, port=port)
-                self.client.ping()
-            except Exception:
-                self.client = None
+                self._release(ClamdSession(self.host, self.port, self.timeout))
+            except OSError as exc:
+                logger.warning("clamd_unreachable", error=str(exc))
                 self.enabled = False
 
-    def scan_bytes(self, data: bytes) -> None:
-        if not self.enabled or self.client is None:
+    def _acquire(self) -> ClamdSession:
+        while True:
+            try:
+                session = self._pool.get_nowait()
+            except queue.Empty:
+                return ClamdSession(self.host, self.port, self.timeout)
+            if not session.is_stale():
+                return session
+            session.broken = True
+            session.close()
+
+    def _release(self, session: ClamdSession) -> None:
+        if session.broken:
+            session.close()
             return
-        res = self.client.instream(data)  # type: ignore
-        if isinstance(res, dict):
-            status = next(iter(res.values()))
-            if isinstance(status, tuple) and status[0] == 'FOUND':
-                raise ValueError("Malware detected")
+        try:
+            self._pool.put_nowait(session)
+        except queue.Full:
+            session.close()
+
+    def stream(self) -> ScanStream:
+        return ScanStream(self)
+
+    def scan_bytes(self, data: bytes) -> None:
+        with self.stream() as scan:
+            scan.feed(memoryview(data))
 
 
 scanner = AvScanner()
@@ -0,0 +1,137 @@
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+from app.utils.executor import ExecutorSaturated
+from app.utils.instrument import batch_span, span_context
+from app.utils.logging import logger
+from app.utils.metrics import BATCH_QUEUE_DEPTH, BATCH_SIZE, BATCH_WAIT_SECONDS
+
+
+BatchHandler = Callable[[List[Any]], List[Any]]
+BatchRunner = Callable[[BatchHandler, List[Any]], Awaitable[List[Any]]]
+
+
+async def _run_in_default_executor(handler: BatchHandler, items: List[Any]) -> List[Any]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, contextvars.copy_context().run, handler, items)
+
+
+class MicroBatcher:
+    """Collects concurrent submissions into batches for a blocking handler.
+
+    A batch is dispatched once ``max_batch_size`` items are queued or
+    ``timeout_ms`` has passed since the first item arrived. Items are sorted
+    by ``size_fn`` before dispatch so padded inputs stay close in length.
+    Submissions beyond ``max_queue`` waiting items raise ``ExecutorSaturated``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: BatchHandler,
+        max_batch_size: int,
+        timeout_ms: int,
+        size_fn: Callable[[Any], int] = len,
+        runner: Optional[BatchRunner] = None,
+        max_queue: Optional[int] = None,
+        retry_after: int = 1,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.timeout = max(0, timeout_ms) / 1000.0
+        self.size_fn = size_fn
+        self.runner = runner or _run_in_default_executor
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._busy = False  # a batch has left the queue and is not yet resolved
+        self._closed = False
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._queue is None:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            # A fresh context: the worker outlives the request that happened to start it,
+            # and batches serve many requests, so they must not inherit that request's span;
+            # each batch links back to the spans of the requests it serves instead.
+            self._worker = loop.create_task(self._run(self._queue), context=contextvars.Context())
+        return self._queue
+
+    async def submit(self, item: Any) -> Any:
+        queue = self._ensure_worker()
+        if self.max_queue is not None and queue.qsize() >= self.max_queue:
+            raise ExecutorSaturated(self.name, self.retry_after)
+        fut = asyncio.get_running_loop().create_future()
+        queue.put_nowait((item, fut, time.monotonic(), span_context()))
+        BATCH_QUEUE_DEPTH.labels(self.name).set(queue.qsize())
+        return await fut
+
+    async def _collect(self, queue: asyncio.Queue) -> List[tuple]:
+        batch = [await queue.get()]
+        self._busy = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while len(batch) < self.max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        BATCH_QUEUE_DEPTH.labels(self.name).set(queue.qsize())
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await self._collect(queue)
+            batch = [entry for entry in batch if not entry[1].done()]
+            try:
+                if batch:
+                    await self._dispatch(batch)
+            finally:
+                self._busy = False
+            if self._closed and queue.empty():
+                return
+
+    async def close(self) -> None:
+        """Dispatch everything already queued, then stop the worker so the handler can be freed."""
+        self._closed = True
+        worker = self._worker
+        if worker is None:
+            return
+        while not worker.done() and (self._busy or (self._queue is not None and not self._queue.empty())):
+            await asyncio.sleep(self.timeout or 0.001)
+        if not worker.done():
+            worker.cancel()  # idle in queue.get(), so nothing is lost
+
+    async def _dispatch(self, batch: List[tuple]) -> None:
+        batch.sort(key=lambda entry: self.size_fn(entry[0]))
+        now = time.monotonic()
+        for _, _, enqueued_at, _ in batch:
+            BATCH_WAIT_SECONDS.labels(self.name).observe(now - enqueued_at)
+        BATCH_SIZE.labels(self.name).observe(len(batch))
+        try:
+            with batch_span(f"{self.name}.batch", (entry[3] for entry in batch), **{"batch.size": len(batch)}):
+                results = await self.runner(self.handler, [item for item, _, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as exc:
+            logger.error("batch_dispatch_failed", batcher=self.name, size=len(batch), error=str(exc))
+            for _, fut, _, _ in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, fut, _, _), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
@@ -1,57 +1,215 @@
 import json
+import os
 import time
 import hashlib
-from typing import Any, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional
 from app.core.config import settings
+from app.utils.instrument import measure
 from app.utils.logging import logger
+from app.utils.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_L1_BYTES, CACHE_L1_ENTRIES, CACHE_MISSES
+from app.utils.redis_pool import RedisPool, RedisUnavailable, redis_pool
 
-try:
-    import redis  # type: ignore
-except Exception:  # pragma: no cover
-    redis = None  # type: ignore
+
+_MISSING = object()
+
+
+class LruStore:
+    """Thread-safe LRU bounded by entry count and serialized bytes.
+
+    Values are kept decoded so hits skip ``json.loads``; callers must treat
+    returned objects as read-only.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.bytes = 0
+        self._data: "OrderedDict[str, tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _drop(self, key: str, reason: str) -> None:
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+        CACHE_EVICTIONS.labels(reason).inc()
+
+    def _report(self) -> None:
+        CACHE_L1_ENTRIES.set(len(self._data))
+        CACHE_L1_BYTES.set(self.bytes)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            if time.time() > entry[0]:
+                self._drop(key, "expired")
+                self._report()
+                return _MISSING
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, size: int, expires_at: float) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self.bytes -= self._data.pop(key)[2]
+            self._data[key] = (expires_at, value, size)
+            self.bytes += size
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._data)), "capacity")
+            self._report()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._data:
+                self.bytes -= self._data.pop(key)[2]
+                self._report()
+
+    def sweep(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _, _) in self._data.items() if now > expires_at]
+            for key in expired:
+                self._drop(key, "expired")
+            self._report()
+        return len(expired)
 
 
 class Cache:
-    def __init__(self, url: Optional[str], default_ttl: int) -> None:
+    def __init__(self, pool: RedisPool, default_ttl: int) -> None:
         self.ttl = max(1, default_ttl)
-        self.redis = None
-        self.memory_store: dict[str, tuple[float, str]] = {}
-        if url and redis is not None:
-            try:
-                self.redis = redis.from_url(url, decode_responses=True)
-                self.redis.ping()
-                logger.info("cache_redis_enabled")
-            except Exception as exc:  # pragma: no cover
-                logger.warning("cache_redis_failed", error=str(exc))
-                self.redis = None
+        self.l1_ttl = max(1, settings.cache_l1_ttl_seconds)
+        self.redis = pool
+        self.memory_store = LruStore(settings.cache_l1_max_entries, settings.cache_l1_max_bytes)
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        if pool.configured:
+            logger.info("cache_redis_enabled")
         else:
             logger.info("cache_memory_enabled")
+        self._start_sweeper(settings.cache_sweep_interval_seconds)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start_sweeper(self, interval: int) -> None:
+        if interval <= 0:
+            return
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                removed = self.memory_store.sweep()
+                if removed:
+                    logger.debug("cache_swept", removed=removed)
+
+        self._sweeper = threading.Thread(target=loop, name="cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _after_fork(self) -> None:
+        # Only the forking thread survives: the sweeper is gone and may have died holding the lock.
+        self.memory_store._lock = threading.Lock()
+        self._start_sweeper(settings.cache_sweep_interval_seconds)
+
+    def close(self) -> None:
+        self._stop.set()
 
     @staticmethod
     def hash_key(parts: list[str]) -> str:
         h = hashlib.sha256("|".join(parts).encode()).hexdigest()
         return f"cache:{h[:32]}"
 
-    def get_json(self, key: str) -> Optional[Any]:
-        if self.redis is not None:
-            val = self.redis.get(key)
-            return json.loads(val) if val else None
-        entry = self.memory_store.get(key)
-        if not entry:
+    def _l1_expiry(self, ttl: int) -> float:
+        # With Redis behind it, L1 only holds entries briefly so other workers' writes show up.
+        if self.redis.configured:
+            ttl = min(ttl, self.l1_ttl)
+        return time.time() + ttl
+
+    async def get_json(self, key: str) -> Optional[Any]:
+        value = self.memory_store.get(key)
+        if value is not _MISSING:
+            CACHE_HITS.labels("l1").inc()
+            return value
+        CACHE_MISSES.labels("l1").inc()
+        if not self.redis.configured:
+            return None
+        try:
+            with measure("cache.get", "redis", "keys", 1):
+                val = await self.redis.execute(lambda r: r.get(key))
+        except RedisUnavailable:
             return None
-        expires_at, payload = entry
-        if time.time() > expires_at:
-            del self.memory_store[key]
+        if not val:
+            CACHE_MISSES.labels("l2").inc()
             return None
-        return json.loads(payload)
+        CACHE_HITS.labels("l2").inc()
+        value = json.loads(val)
+        self.memory_store.set(key, value, len(val), self._l1_expiry(self.ttl))
+        return value
 
-    def set_json(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    async def set_json(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         payload = json.dumps(value)
         ttl = ttl or self.ttl
-        if self.redis is not None:
-            self.redis.setex(key, ttl, payload)
-        else:
-            self.memory_store[key] = (time.time() + ttl, payload)
+        if self.redis.configured:
+            try:
+                with measure("cache.set", "redis", "keys", 1):
+                    await self.redis.execute(lambda r: r.setex(key, ttl, payload))
+            except RedisUnavailable:
+                pass  # L1 still serves this worker while Redis is down
+        # Store the decoded round trip so L1 hits look exactly like L2 hits.
+        self.memory_store.set(key, json.loads(payload), len(payload), self._l1_expiry(ttl))
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        values: List[Optional[Any]] = [None] * len(keys)
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            value = self.memory_store.get(key)
+            if value is _MISSING:
+                missing.append(i)
+            else:
+                values[i] = value
+        CACHE_HITS.labels("l1").inc(len(keys) - len(missing))
+        CACHE_MISSES.labels("l1").inc(len(missing))
+        if not missing or not self.redis.configured:
+            return values
+        try:
+            with measure("cache.get", "redis", "keys", len(missing)):
+                raw = await self.redis.execute(lambda r: r.mget([keys[i] for i in missing]))
+        except RedisUnavailable:
+            return values
+        hits = 0
+        for i, val in zip(missing, raw):
+            if val:
+                hits += 1
+                values[i] = json.loads(val)
+                self.memory_store.set(keys[i], values[i], len(val), self._l1_expiry(self.ttl))
+        CACHE_HITS.labels("l2").inc(hits)
+        CACHE_MISSES.labels("l2").inc(len(missing) - hits)
+        return values
+
+    async def set_many(self, items: List[tuple[str, Any]], ttl: Optional[int] = None) -> None:
+        if not items:
+            return
+        ttl = ttl or self.ttl
+        payloads = [(key, json.dumps(value)) for key, value in items]
+        if self.redis.configured:
+
+            async def write(r):  # type: ignore
+                async with r.pipeline(transaction=False) as p:
+                    for key, payload in payloads:
+                        p.setex(key, ttl, payload)
+                    await p.execute()
+
+            try:
+                with measure("cache.set", "redis", "keys", len(payloads)):
+                    await self.redis.execute(write)
+            except RedisUnavailable:
+                pass
+        expires_at = self._l1_expiry(ttl)
+        for key, payload in payloads:
+            self.memory_store.set(key, json.loads(payload), len(payload), expires_at)
 
 
-cache = Cache(settings.redis_url, settings.cache_ttl_seconds)
+cache = Cache(redis_pool, settings.cache_ttl_seconds)
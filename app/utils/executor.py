@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import inspect
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings, StageLimits
+from app.utils.logging import logger
+from app.utils.metrics import INFERENCE_INFLIGHT, INFERENCE_REJECTED
+
+
+class ExecutorSaturated(Exception):
+    def __init__(self, stage: str, retry_after: int) -> None:
+        super().__init__(f"{stage} stage saturated")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+# Per-process service instances used when a stage runs on a process pool.
+_worker_instances: dict[type, Any] = {}
+
+
+def _invoke_in_worker(cls: type, method: str, args: tuple, kwargs: dict) -> Any:
+    instance = _worker_instances.get(cls)
+    if instance is None:
+        instance = _worker_instances[cls] = cls()
+    return getattr(instance, method)(*args, **kwargs)
+
+
+class StageExecutor:
+    def __init__(self, name: str, limits: StageLimits, retry_after: int) -> None:
+        self.name = name
+        self.kind = limits.kind
+        self.workers = max(1, limits.workers)
+        self.max_pending = self.workers + max(0, limits.queue_size)
+        self.retry_after = retry_after
+        self.pending = 0
+        self._pool: Optional[Executor] = None
+
+    @property
+    def is_process(self) -> bool:
+        return self.kind == "process"
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.is_process:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix=f"infer-{self.name}",
+                )
+            logger.info("inference_pool_started", stage=self.name, kind=self.kind, workers=self.workers)
+        return self._pool
+
+    def check_capacity(self) -> None:
+        if self.pending >= self.max_pending:
+            INFERENCE_REJECTED.labels(self.name).inc()
+            raise ExecutorSaturated(self.name, self.retry_after)
+
+    def _prepare(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Callable[[], Any]:
+        if isinstance(fn, partial):
+            args = fn.args + args
+            kwargs = {**fn.keywords, **kwargs}
+            fn = fn.func
+        if self.is_process:
+            # Buffer views cannot cross the process boundary.
+            args = tuple(bytes(a) if isinstance(a, memoryview) else a for a in args)
+        if self.is_process and inspect.ismethod(fn):
+            # Bound service methods drag their models along when pickled;
+            # rebuild the service inside the worker process instead.
+            return partial(_invoke_in_worker, type(fn.__self__), fn.__name__, args, kwargs)
+        if self.is_process:
+            return partial(fn, *args, **kwargs)
+        # run_in_executor does not carry contextvars over; without them, spans opened
+        # in the pool thread would not be children of the request's span.
+        return partial(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        self.check_capacity()
+        call = self._prepare(fn, args, kwargs)
+        self.pending += 1
+        INFERENCE_INFLIGHT.labels(self.name).set(self.pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_pool(), call)
+        finally:
+            self.pending -= 1
+            INFERENCE_INFLIGHT.labels(self.name).set(self.pending)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class InferenceExecutor:
+    def __init__(self, stages: Dict[str, StageLimits], retry_after: int) -> None:
+        self.retry_after = retry_after
+        self.stages = {name: StageExecutor(name, limits, retry_after) for name, limits in stages.items()}
+
+    def stage(self, name: str) -> StageExecutor:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageExecutor(name, StageLimits(), self.retry_after)
+        return stage
+
+    async def run(self, stage: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await self.stage(stage).run(fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        for stage in self.stages.values():
+            stage.shutdown()
+
+
+executor = InferenceExecutor(settings.inference_stages, settings.inference_retry_after_seconds)
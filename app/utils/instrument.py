@@ -0,0 +1,128 @@
+import time
+from typing import Iterable, Optional, Sequence
+from opentelemetry import trace
+from app.core.config import settings
+from app.utils import tracing
+from app.utils.metrics import SERVICE_CACHE_LOOKUPS, STAGE_SECONDS
+
+# Resolves through the global provider, so spans follow whatever setup_tracing installed.
+_tracer = trace.get_tracer("app.services")
+
+# Input size is a histogram label, bucketed so cardinality stays fixed: (upper bound, label) per unit.
+SIZE_BUCKETS = {
+    "tokens": ((16, "<=16"), (64, "<=64"), (256, "<=256"), (1024, "<=1k"), (4096, "<=4k")),
+    "chars": ((64, "<=64"), (256, "<=256"), (1024, "<=1k"), (4096, "<=4k"), (16384, "<=16k")),
+    "pixels": ((500_000, "<=0.5MP"), (2_000_000, "<=2MP"), (8_000_000, "<=8MP"), (24_000_000, "<=24MP")),
+    "keys": ((1, "1"), (8, "<=8"), (64, "<=64"), (512, "<=512")),
+}
+
+
+def size_bucket(unit: str, size: Optional[int]) -> str:
+    if size is None:
+        return "unknown"
+    bounds = SIZE_BUCKETS[unit]
+    for bound, label in bounds:
+        if size <= bound:
+            return label
+    return ">" + bounds[-1][1][2:]
+
+
+class Measure:
+    """Times one stage call into STAGE_SECONDS and, when tracing exports, wraps it in a child span.
+
+    ``size`` may be set inside the block once the input has been measured,
+    e.g. after tokenization.
+    """
+
+    __slots__ = ("stage", "model", "unit", "size", "_start", "_span_cm", "_span")
+
+    def __init__(self, stage: str, model: str, unit: str, size: Optional[int]) -> None:
+        self.stage = stage
+        self.model = model
+        self.unit = unit
+        self.size = size
+        self._span_cm = None
+        self._span = None
+
+    def __enter__(self) -> "Measure":
+        if tracing.enabled():
+            self._span_cm = _tracer.start_as_current_span(self.stage, attributes={"model": self.model})
+            self._span = self._span_cm.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore
+        elapsed = time.perf_counter() - self._start
+        if settings.stage_metrics_enabled:
+            STAGE_SECONDS.labels(self.stage, self.model, size_bucket(self.unit, self.size)).observe(elapsed)
+        if self._span_cm is not None:
+            if self.size is not None:
+                self._span.set_attribute(f"input.{self.unit}", self.size)
+            self._span_cm.__exit__(exc_type, exc, tb)  # records the exception and error status, if any
+
+
+class _Disabled:
+    """Shared stand-in when metrics and exporters are both off; costs one call and two no-op methods."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_Disabled":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore
+        return None
+
+    def __setattr__(self, name: str, value: object) -> None:
+        pass  # ``m.size = n`` inside a block is a no-op here
+
+
+_DISABLED = _Disabled()
+
+
+def measure(stage: str, model: str = "", unit: str = "chars", size: Optional[int] = None):  # type: ignore
+    if not settings.stage_metrics_enabled and not tracing.enabled():
+        return _DISABLED
+    return Measure(stage, model, unit, size)
+
+
+def span(name: str, **attributes: object):  # type: ignore
+    """A child span only, for steps that already have their own histogram."""
+    if not tracing.enabled():
+        return _DISABLED
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def span_context() -> Optional[trace.SpanContext]:
+    """The caller's span, for work that runs later outside it (a batch); None when tracing is off."""
+    if not tracing.enabled():
+        return None
+    ctx = trace.get_current_span().get_span_context()
+    return ctx if ctx.is_valid else None
+
+
+def batch_span(name: str, contexts: Iterable[Optional[trace.SpanContext]], **attributes: object):  # type: ignore
+    """A span for work shared by several requests, linked to each of their spans.
+
+    A batch has no single parent, so it starts its own trace; the links lead
+    from it back to every request it served, and stage spans opened inside
+    it (e.g. ``translate``) nest under it.
+    """
+    if not tracing.enabled():
+        return _DISABLED
+    # Coalesced requests can sit in one batch more than once; link each span once.
+    unique = {(c.trace_id, c.span_id): c for c in contexts if c is not None}
+    links = [trace.Link(ctx) for ctx in unique.values()]
+    return _tracer.start_as_current_span(name, links=links, attributes=attributes)
+
+
+def cache_lookups(cache: str, hits: int, misses: int) -> None:
+    """Counts lookups in a service-level result cache (the shared L1/L2 cache counts by tier)."""
+    if settings.stage_metrics_enabled:
+        if hits:
+            SERVICE_CACHE_LOOKUPS.labels(cache, "hit").inc(hits)
+        if misses:
+            SERVICE_CACHE_LOOKUPS.labels(cache, "miss").inc(misses)
+
+
+def text_size(texts: Sequence[str]) -> int:
+    return sum(len(text) for text in texts)
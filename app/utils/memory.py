@@ -0,0 +1,61 @@
+import gc
+import os
+import resource
+import sys
+from typing import Dict
+
+
+# smaps_rollup fields worth reporting, in kB.
+_SMAPS_FIELDS = {
+    "Rss": "rss_bytes",
+    "Pss": "pss_bytes",
+    "Shared_Clean": "shared_clean_bytes",
+    "Shared_Dirty": "shared_dirty_bytes",
+    "Private_Clean": "private_clean_bytes",
+    "Private_Dirty": "private_dirty_bytes",
+}
+
+
+def process_memory(pid: int = 0) -> Dict[str, int]:
+    """RSS/PSS breakdown for one process.
+
+    PSS splits each shared page evenly between the processes mapping it, so
+    summing PSS over workers gives the node's real footprint; RSS double
+    counts weights that workers share after a preloading fork.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup", "r", encoding="ascii") as f:
+            lines = f.readlines()
+    except OSError:
+        if pid:
+            return {}
+        # No smaps_rollup (non-Linux or old kernel): peak RSS is the best available.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"max_rss_bytes": peak if sys.platform == "darwin" else peak * 1024}
+    usage: Dict[str, int] = {}
+    for line in lines:
+        name, _, rest = line.partition(":")
+        if name in _SMAPS_FIELDS:
+            usage[_SMAPS_FIELDS[name]] = int(rest.split()[0]) * 1024
+    return usage
+
+
+def freeze_heap() -> None:
+    """Move every live object out of the collector's generations before forking.
+
+    The cyclic GC writes to the header of each object it scans, which would
+    copy the page it lives on into every worker. Frozen objects are never
+    scanned, so pages holding model state stay shared.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def worker_pids() -> list[int]:
+    """Pids of this process and its siblings, when running under a preforking master."""
+    ppid = os.getppid()
+    try:
+        with open(f"/proc/{ppid}/task/{ppid}/children", "r", encoding="ascii") as f:
+            return sorted(int(pid) for pid in f.read().split())
+    except OSError:
+        return [os.getpid()]
@@ -0,0 +1,90 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+
+BATCH_QUEUE_DEPTH = Gauge(
+    "batch_queue_depth",
+    "Requests waiting in a micro-batch queue",
+    ["batcher"],
+)
+BATCH_SIZE = Histogram(
+    "batch_size",
+    "Requests per dispatched micro-batch",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+BATCH_WAIT_SECONDS = Histogram(
+    "batch_wait_seconds",
+    "Time a request spent queued before its batch was dispatched",
+    ["batcher"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+INFERENCE_INFLIGHT = Gauge(
+    "inference_inflight",
+    "Calls running or queued on an inference stage pool",
+    ["stage"],
+)
+INFERENCE_REJECTED = Counter(
+    "inference_rejected_total",
+    "Calls rejected because an inference stage was saturated",
+    ["stage"],
+)
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds",
+    "Wall time of a single pipeline stage",
+    ["pipeline", "stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+STAGE_SECONDS = Histogram(
+    "stage_seconds",
+    "Wall time of one service call, by stage, model and bucketed input size",
+    ["stage", "model", "size"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+SERVICE_CACHE_LOOKUPS = Counter(
+    "service_cache_lookups_total",
+    "Lookups in service-level result caches",
+    ["cache", "result"],
+)
+
+OCR_STEP_SECONDS = Histogram(
+    "ocr_step_seconds",
+    "Wall time of one OCR preprocessing or recognition step",
+    ["step"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+PHASH_LOOKUPS = Counter(
+    "phash_lookups_total",
+    "Uploads checked against the perceptual-hash index",
+    ["result"],
+)
+
+MODEL_SWAPS = Counter(
+    "model_swaps_total",
+    "Hot swaps to a new model version, by outcome",
+    ["model", "result"],
+)
+
+TRAINING_JOBS = Counter(
+    "training_jobs_total",
+    "Training jobs that left the job runner, by final state",
+    ["kind", "state"],
+)
+
+CACHE_HITS = Counter("cache_hits_total", "Cache lookups served", ["tier"])
+CACHE_MISSES = Counter("cache_misses_total", "Cache lookups not served", ["tier"])
+CACHE_EVICTIONS = Counter("cache_evictions_total", "Entries dropped from the in-process cache", ["reason"])
+CACHE_L1_ENTRIES = Gauge("cache_l1_entries", "Entries held in the in-process cache")
+CACHE_L1_BYTES = Gauge("cache_l1_bytes", "Serialized bytes held in the in-process cache")
+
+SINGLEFLIGHT_COALESCED = Counter(
+    "singleflight_coalesced_total",
+    "Requests served by another request's in-flight computation",
+    ["name", "scope"],
+)
+
+REDIS_BREAKER_OPEN = Gauge("redis_breaker_open", "1 while Redis calls are short-circuited to in-memory fallbacks")
+REDIS_ERRORS = Counter("redis_errors_total", "Redis calls that failed or timed out")
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.utils.logging import logger
+
+try:
+    import onnxruntime as ort  # type: ignore
+except Exception:  # pragma: no cover
+    ort = None  # type: ignore
+
+
+def onnx_enabled() -> bool:
+    return settings.inference_backend == "onnx" and ort is not None
+
+
+def model_dir(task: str, base: Optional[Path] = None) -> Path:
+    # ``base`` is a model-store version directory, which holds the export directly.
+    return base if base is not None else Path(settings.onnx_model_dir) / task
+
+
+def resolve_model(task: str, name: str = "model", base: Optional[Path] = None) -> Path:
+    base = model_dir(task, base)
+    quantized = base / f"{name}.int8.onnx"
+    if settings.onnx_quantized and quantized.exists():
+        return quantized
+    return base / f"{name}.onnx"
+
+
+def create_session(path: Path) -> "ort.InferenceSession":
+    if ort is None:
+        raise RuntimeError("onnxruntime is not installed")
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = max(1, settings.onnx_intra_op_threads)
+    opts.inter_op_num_threads = max(1, settings.onnx_inter_op_threads)
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(str(path), sess_options=opts, providers=["CPUExecutionProvider"])
+    logger.info("onnx_session_loaded", path=str(path))
+    return session
+
+
+def load_config(task: str, base: Optional[Path] = None) -> Dict[str, Any]:
+    with open(model_dir(task, base) / "config.json", "r", encoding="utf-8") as f:
+        return json.load(f)
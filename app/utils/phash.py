@@ -0,0 +1,232 @@
+import io
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from app.utils.logging import logger
+
+try:
+    from PIL import Image, ImageOps  # type: ignore
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    Image = None  # type: ignore
+    ImageOps = None  # type: ignore
+    np = None  # type: ignore
+
+
+def _thumbnail(data: Union[bytes, memoryview], size: Tuple[int, int]) -> "Image.Image":
+    image = Image.open(io.BytesIO(data))
+    # A hash only needs a few dozen pixels; JPEG draft mode decodes at 1/8 scale.
+    image.draft("L", (size[0] * 4, size[1] * 4))
+    image = ImageOps.exif_transpose(image).convert("L")
+    return image.resize(size, Image.Resampling.BOX, reducing_gap=2.0)
+
+
+def dhash(data: Union[bytes, memoryview]) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 thumbnail."""
+    pixels = np.asarray(_thumbnail(data, (9, 8)), dtype=np.int16)
+    return _pack(pixels[:, 1:] > pixels[:, :-1])
+
+
+_DCT_CACHE: Dict[int, "np.ndarray"] = {}
+
+
+def _dct_matrix(n: int) -> "np.ndarray":
+    if n not in _DCT_CACHE:
+        k = np.arange(n)[:, None]
+        _DCT_CACHE[n] = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    return _DCT_CACHE[n]
+
+
+def phash(data: Union[bytes, memoryview]) -> int:
+    """64-bit perceptual hash: low 8x8 DCT frequencies of a 32x32 thumbnail against their median."""
+    pixels = np.asarray(_thumbnail(data, (32, 32)), dtype=np.float64)
+    m = _dct_matrix(32)
+    low = (m @ pixels @ m.T)[:8, :8].ravel()[1:]  # drop DC, which only encodes brightness
+    return _pack(np.append(low > np.median(low), False))
+
+
+def _pack(bits: "np.ndarray") -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+HASHERS: Dict[str, Callable[[Union[bytes, memoryview]], int]] = {"phash": phash, "dhash": dhash}
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance.
+
+    Children are keyed by their distance to the parent, so the triangle
+    inequality prunes every subtree outside ``[d - radius, d + radius]``.
+    """
+
+    __slots__ = ("root", "size")
+
+    def __init__(self) -> None:
+        self.root: Optional[list] = None  # [hash, value, {distance: child}]
+        self.size = 0
+
+    def add(self, key: int, value: Any) -> None:
+        self.size += 1
+        if self.root is None:
+            self.root = [key, value, {}]
+            return
+        node = self.root
+        while True:
+            d = (key ^ node[0]).bit_count()
+            if d == 0:
+                self.size -= 1  # keep the first id registered for this hash
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [key, value, {}]
+                return
+            node = child
+
+    def search(self, key: int, radius: int) -> List[Tuple[int, Any]]:
+        found: List[Tuple[int, Any]] = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = (key ^ node[0]).bit_count()
+            if d <= radius:
+                found.append((d, node[1]))
+            for dist, child in node[2].items():
+                if d - radius <= dist <= d + radius:
+                    stack.append(child)
+        found.sort()
+        return found
+
+
+class PerceptualIndex:
+    """Maps perceptual image hashes to the id of the first page seen with that look.
+
+    Entries are appended to a JSONL file, which every worker tails before a
+    lookup so pages indexed by siblings are found without a restart. Entries
+    expire after ``ttl_seconds``. Once expired entries or the entry count pass
+    a tenth over their limits, the file is rewritten with only the newest live
+    entries and swapped in. Siblings notice the new inode and reload.
+    """
+
+    def __init__(self, path: str, algorithm: str, max_distance: int, max_entries: int, ttl_seconds: float) -> None:
+        self.path = path
+        self.algorithm = algorithm if algorithm in HASHERS else "phash"
+        self.hasher = HASHERS[self.algorithm]
+        self.max_distance = max_distance
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.tree = BKTree()
+        self._offset = 0
+        self._inode = 0
+        self._oldest = float("inf")
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._tail()
+        logger.info("phash_index_loaded", path=path, entries=self.tree.size, algorithm=self.algorithm)
+
+    def _reset(self, inode: int) -> None:
+        self.tree = BKTree()
+        self._offset = 0
+        self._inode = inode
+        self._oldest = float("inf")
+
+    def _tail(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            self._reset(st.st_ino)  # compacted by us or a sibling; reload from the top
+        if st.st_size <= self._offset:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a sibling is mid-write; pick it up next time
+                self._offset += len(line)
+                try:
+                    entry = json.loads(line)
+                    ts = float(entry.get("ts", 0))
+                except ValueError:
+                    continue
+                if entry.get("algo") == self.algorithm and ts >= cutoff:
+                    self.tree.add(int(entry["hash"], 16), (entry["id"], ts))
+                    self._oldest = min(self._oldest, ts)
+
+    def _compact_due(self) -> bool:
+        slack = self.ttl_seconds / 10
+        return self._oldest < time.time() - self.ttl_seconds - slack or self.tree.size > self.max_entries * 1.1
+
+    def _compact(self) -> None:
+        """Rewrite the file with the newest live entries; an entry a sibling appends meanwhile may be lost."""
+        cutoff = time.time() - self.ttl_seconds
+        entries = []
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if float(entry.get("ts", 0)) >= cutoff:
+                        entries.append((float(entry["ts"]), line if line.endswith(b"\n") else line + b"\n"))
+                except ValueError:
+                    continue
+        entries.sort(key=lambda e: e[0])
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.writelines(line for _, line in entries[-self.max_entries:])
+        os.replace(tmp, self.path)
+        self._reset(0)
+        self._tail()
+        logger.info("phash_index_compacted", path=self.path, entries=self.tree.size)
+
+    def hash(self, data: Union[bytes, memoryview]) -> Optional[int]:
+        if Image is None or np is None:
+            return None
+        try:
+            return self.hasher(data)
+        except Exception as exc:
+            logger.warning("phash_failed", error=str(exc))
+            return None
+
+    def match(self, key: int) -> Optional[Tuple[int, str]]:
+        with self._lock:
+            self._tail()
+            if self._compact_due():
+                try:
+                    self._compact()
+                except OSError as exc:
+                    logger.warning("phash_index_compact_failed", path=self.path, error=str(exc))
+            found = self.tree.search(key, self.max_distance)
+        cutoff = time.time() - self.ttl_seconds
+        # Expired entries stay in the tree until the next compaction; skip them.
+        live = [(d, item_id) for d, (item_id, ts) in found if ts >= cutoff]
+        return live[0] if live else None
+
+    def add(self, key: int, item_id: str) -> None:
+        line = json.dumps({"algo": self.algorithm, "hash": f"{key:016x}", "id": item_id, "ts": round(time.time(), 3)}) + "\n"
+        with self._lock:
+            # One O_APPEND write per entry keeps lines from interleaving across workers.
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode())
+            finally:
+                os.close(fd)
+            self._tail()
+
+    def resolve(self, data: Union[bytes, memoryview], item_id: str) -> Tuple[str, Optional[int]]:
+        """Id of a near-duplicate already indexed (and its distance), else register ``item_id``."""
+        key = self.hash(data)
+        if key is None:
+            return item_id, None
+        found = self.match(key)
+        if found is not None:
+            return found[1], found[0]
+        try:
+            self.add(key, item_id)
+        except OSError as exc:
+            logger.warning("phash_index_write_failed", path=self.path, error=str(exc))
+        return item_id, None
@@ -1,67 +1,139 @@
+import math
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 from fastapi import HTTPException, Request
 from app.core.config import settings
 from app.utils.logging import logger
+from app.utils.redis_pool import RedisPool, RedisUnavailable, redis_pool
 
-try:
-    import redis  # type: ignore
-except Exception:  # pragma: no cover
-    redis = None  # type: ignore
+
+# GCRA in one round trip. State is a single theoretical-arrival-time per key.
+# KEYS[1] = bucket key; ARGV[1] = emission interval (ms); ARGV[2] = burst (requests).
+# Returns {allowed, remaining, reset_after_ms, retry_after_ms}.
+GCRA_LUA = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = interval * tonumber(ARGV[2])
+local tat = tonumber(redis.call("GET", KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - tolerance
+if allow_at > now then
+    return {0, 0, tat - now, allow_at - now}
+end
+redis.call("SET", KEYS[1], new_tat, "PX", math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / interval), new_tat - now, 0}
+"""
+
+
+class RateLimitResult:
+    __slots__ = ("allowed", "limit", "remaining", "reset_after", "retry_after")
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, reset_after: float, retry_after: float) -> None:
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after  # seconds until the bucket is full again
+        self.retry_after = retry_after  # seconds until the next request is allowed
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.remaining)),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class MemoryGcra:
+    """In-process GCRA with the same semantics as ``GCRA_LUA``.
+
+    Each key costs one float (its theoretical arrival time) in an LRU-ordered
+    table. A key whose TAT has passed is indistinguishable from a fresh key,
+    so idle keys are purged from the cold end for free; when the table is
+    still over ``max_keys`` the least recently seen client is dropped.
+    """
+
+    def __init__(self, rpm: int, period: float, max_keys: int) -> None:
+        self.rpm = rpm
+        self.interval = period / rpm
+        self.tolerance = self.interval * rpm
+        self.max_keys = max(1, max_keys)
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def _evict(self, now: float) -> None:
+        tats = self._tats
+        while tats:
+            key, tat = next(iter(tats.items()))
+            if tat > now and len(tats) <= self.max_keys:
+                break
+            del tats[key]
+
+    def check(self, identifier: str, now: Optional[float] = None) -> RateLimitResult:
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            tat = self._tats.get(identifier, now)
+            if tat < now:
+                tat = now
+            new_tat = tat + self.interval
+            allow_at = new_tat - self.tolerance
+            if allow_at > now:
+                return RateLimitResult(False, self.rpm, 0, tat - now, allow_at - now)
+            self._tats[identifier] = new_tat
+            self._tats.move_to_end(identifier)
+            self._evict(now)
+        return RateLimitResult(True, self.rpm, int((now - allow_at) / self.interval), new_tat - now, 0)
 
 
 class RateLimiter:
-    def __init__(self, redis_url: Optional[str], rpm: int) -> None:
+    def __init__(self, pool: RedisPool, rpm: int) -> None:
         self.rpm = max(1, rpm)
         self.period = 60
-        self.redis = None
-        self.memory_store: dict[str, list[float]] = {}
-        if redis_url and redis is not None:
-            try:
-                self.redis = redis.from_url(redis_url, decode_responses=True)
-                self.redis.ping()
-                logger.info("rate_limit_redis_enabled")
-            except Exception as exc:  # pragma: no cover
-                logger.warning("rate_limit_redis_failed", error=str(exc))
-                self.redis = None
+        self.interval_ms = self.period * 1000 / self.rpm
+        self.redis = pool
+        self._script = pool.client.register_script(GCRA_LUA) if pool.configured else None
+        self.memory = MemoryGcra(self.rpm, self.period, settings.rate_limit_memory_max_keys)
+        if pool.configured:
+            logger.info("rate_limit_redis_enabled")
         else:
             logger.info("rate_limit_memory_enabled")
 
     def _key(self, identifier: str) -> str:
         return f"rl:{identifier}"
 
-    def check(self, identifier: str) -> None:
-        now = time.time()
-        window_start = now - self.period
-        if self.redis is not None:
-            key = self._key(identifier)
-            p = self.redis.pipeline(True)
-            p.zremrangebyscore(key, 0, window_start)
-            p.zcard(key)
-            res = p.execute()
-            current = res[1] if isinstance(res, list) else 0
-            if current >= self.rpm:
-                raise HTTPException(status_code=429, detail="Rate limit exceeded")
-            p = self.redis.pipeline(True)
-            p.zadd(key, {str(now): now})
-            p.expire(key, self.period)
-            p.execute()
-        else:
-            bucket = self.memory_store.setdefault(identifier, [])
-            # remove old entries
-            i = 0
-            for ts in bucket:
-                if ts >= window_start:
-                    break
-                i += 1
-            if i:
-                del bucket[:i]
-            if len(bucket) >= self.rpm:
-                raise HTTPException(status_code=429, detail="Rate limit exceeded")
-            bucket.append(now)
+    async def _check_redis(self, identifier: str) -> Optional[RateLimitResult]:
+        try:
+            allowed, remaining, reset_ms, retry_ms = await self.redis.execute(
+                lambda r: self._script(keys=[self._key(identifier)], args=[self.interval_ms, self.rpm])
+            )
+        except RedisUnavailable:
+            return None  # fall back to this worker's in-memory window
+        return RateLimitResult(bool(allowed), self.rpm, int(remaining), reset_ms / 1000, retry_ms / 1000)
+
+    async def check(self, identifier: str) -> RateLimitResult:
+        result = None
+        if self._script is not None:
+            result = await self._check_redis(identifier)
+        if result is None:
+            result = self.memory.check(identifier)
+        if not result.allowed:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers=result.headers())
+        return result
 
 
-rate_limiter = RateLimiter(settings.redis_url, settings.rate_limit_rpm)
+rate_limiter = RateLimiter(redis_pool, settings.rate_limit_rpm)
 
 
 async def rate_limit_dep(request: Request) -> None:
@@ -69,4 +141,5 @@ async def rate_limit_dep(request: Request) -> None:
     auth = request.headers.get("authorization")
     if auth:
         ident = auth[-32:]
-    rate_limiter.check(ident)
+    # Picked up by RateLimitHeadersMiddleware, which also covers streamed responses.
+    request.state.rate_limit = await rate_limiter.check(ident)
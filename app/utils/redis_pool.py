@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+from app.core.config import settings
+from app.utils.logging import logger
+from app.utils.metrics import REDIS_BREAKER_OPEN, REDIS_ERRORS
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except Exception:  # pragma: no cover
+    aioredis = None  # type: ignore
+
+
+T = TypeVar("T")
+
+
+class RedisUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after ``failures`` consecutive errors; lets one probe through after ``reset_seconds``."""
+
+    def __init__(self, failures: int, reset_seconds: float) -> None:
+        self.failures = max(1, failures)
+        self.reset_seconds = reset_seconds
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            # Half-open: let this call probe, and re-open immediately if it fails.
+            self.opened_at = None
+            self.consecutive = self.failures - 1
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive = 0
+        if self.opened_at is not None:
+            self.opened_at = None
+            logger.info("redis_breaker_closed")
+        REDIS_BREAKER_OPEN.set(0)
+
+    def record_failure(self) -> None:
+        self.consecutive += 1
+        if self.consecutive >= self.failures and self.opened_at is None:
+            self.opened_at = time.monotonic()
+            REDIS_BREAKER_OPEN.set(1)
+            logger.warning("redis_breaker_opened", failures=self.consecutive)
+
+
+class RedisPool:
+    def __init__(self, url: Optional[str]) -> None:
+        self.client: Optional["aioredis.Redis"] = None
+        self.breaker = CircuitBreaker(settings.redis_breaker_failures, settings.redis_breaker_reset_seconds)
+        self.timeout = max(1, settings.redis_socket_timeout_ms) / 1000.0
+        self._health_task: Optional[asyncio.Task] = None
+        if url and aioredis is not None:
+            pool = aioredis.ConnectionPool.from_url(
+                url,
+                decode_responses=True,
+                max_connections=settings.redis_max_connections,
+                socket_timeout=self.timeout,
+                socket_connect_timeout=max(1, settings.redis_connect_timeout_ms) / 1000.0,
+                health_check_interval=settings.redis_health_check_interval_seconds,
+            )
+            self.client = aioredis.Redis(connection_pool=pool)
+            logger.info("redis_pool_configured", max_connections=settings.redis_max_connections)
+
+    @property
+    def configured(self) -> bool:
+        return self.client is not None
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None and not self.breaker.is_open
+
+    async def execute(self, fn: Callable[["aioredis.Redis"], Awaitable[T]]) -> T:
+        if self.client is None or not self.breaker.allow():
+            raise RedisUnavailable("redis unavailable")
+        try:
+            result = await asyncio.wait_for(fn(self.client), self.timeout)
+        except Exception as exc:
+            REDIS_ERRORS.inc()
+            self.breaker.record_failure()
+            raise RedisUnavailable(str(exc)) from exc
+        self.breaker.record_success()
+        return result
+
+    async def ping(self) -> bool:
+        try:
+            return bool(await self.execute(lambda r: r.ping()))
+        except RedisUnavailable:
+            return False
+
+    def start_health_checks(self) -> None:
+        interval = settings.redis_health_check_interval_seconds
+        if self.client is None or interval <= 0 or self._health_task is not None:
+            return
+
+        async def loop() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                await self.ping()
+
+        self._health_task = asyncio.get_running_loop().create_task(loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self.client is not None:
+            await self.client.aclose()
+
+
+redis_pool = RedisPool(settings.redis_url)
@@ -0,0 +1,109 @@
+import asyncio
+import time
+import uuid
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional
+from app.core.config import settings
+from app.utils.logging import logger
+from app.utils.metrics import SINGLEFLIGHT_COALESCED
+from app.utils.redis_pool import RedisUnavailable, redis_pool
+
+
+Recheck = Callable[[], Awaitable[Optional[Any]]]
+
+# Delete the lock only if we still own it.
+RELEASE_LOCK_LUA = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Deduplicates concurrent computations that share a cache key.
+
+    The first caller runs ``fn`` in a task; concurrent callers with the same
+    key await that task instead. The task is shielded, so a disconnecting
+    leader does not cancel the work for everyone else. With
+    ``singleflight_redis_lock`` enabled, leaders in different workers also
+    coordinate through a short Redis lock, and losers poll ``recheck``
+    (normally a cache lookup) until the winner has stored its result.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[str, asyncio.Task] = {}
+        self._waiters: dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[asyncio.Task]:
+        return self._calls.get(key)
+
+    def waiters(self, key: str) -> int:
+        return self._waiters.get(key, 0)
+
+    def register(self, key: str, aw: Awaitable[Any]) -> asyncio.Task:
+        task = asyncio.ensure_future(aw)
+        self._calls[key] = task
+        task.add_done_callback(partial(self._done, key))
+        return task
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved; callers re-raise it themselves
+
+    async def join(self, key: str, task: asyncio.Task) -> Any:
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        SINGLEFLIGHT_COALESCED.labels(self.name, "local").inc()
+        return await asyncio.shield(task)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], recheck: Optional[Recheck] = None) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            return await self.join(key, task)
+        task = self.register(key, self._lead(key, fn, recheck))
+        return await asyncio.shield(task)
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]], recheck: Optional[Recheck]) -> Any:
+        if not settings.singleflight_redis_lock or not redis_pool.available or recheck is None:
+            return await fn()
+        lock_key = f"sf:{key}"
+        token = uuid.uuid4().hex
+        ttl_ms = max(1, settings.singleflight_lock_ttl_ms)
+        try:
+            acquired = await redis_pool.execute(lambda r: r.set(lock_key, token, nx=True, px=ttl_ms))
+        except RedisUnavailable:
+            return await fn()
+        if not acquired:
+            result = await self._await_peer(lock_key, recheck, ttl_ms / 1000.0)
+            if result is not None:
+                SINGLEFLIGHT_COALESCED.labels(self.name, "redis").inc()
+                return result
+            # Peer failed or its lock expired without a result: compute ourselves.
+            return await fn()
+        try:
+            return await fn()
+        finally:
+            try:
+                await redis_pool.execute(lambda r: r.eval(RELEASE_LOCK_LUA, 1, lock_key, token))
+            except RedisUnavailable as exc:  # pragma: no cover
+                logger.warning("singleflight_unlock_failed", key=key, error=str(exc))
+
+    async def _await_peer(self, lock_key: str, recheck: Recheck, timeout: float) -> Optional[Any]:
+        deadline = time.monotonic() + timeout
+        poll = max(1, settings.singleflight_poll_ms) / 1000.0
+        while time.monotonic() < deadline:
+            await asyncio.sleep(poll)
+            result = await recheck()
+            if result is not None:
+                return result
+            try:
+                held = await redis_pool.execute(lambda r: r.exists(lock_key))
+            except RedisUnavailable:
+                held = False
+            if not held:
+                return await recheck()
+        return None
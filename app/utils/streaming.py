@@ -0,0 +1,20 @@
+import json
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def wants_sse(accept: str) -> bool:
+    return SSE_MEDIA_TYPE in (accept or "")
+
+
+def encode_event(event: str, data: Any, sse: bool) -> bytes:
+    data = jsonable_encoder(data)
+    if sse:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return f"event: {event}\ndata: {payload}\n\n".encode()
+    line = json.dumps({"event": event, "data": data}, ensure_ascii=False, separators=(",", ":"))
+    return (line + "\n").encode()
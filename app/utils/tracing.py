@@ -6,8 +6,16 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
+# Whether spans go anywhere; with no exporter, service code skips creating child spans.
+_exporting = False
+
+
+def enabled() -> bool:
+    return _exporting
+
 
 def setup_tracing(app) -> None:
+    global _exporting
     endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
     service_name = os.getenv("OTEL_SERVICE_NAME", "magazine-ai-api")
     resource = Resource.create({"service.name": service_name})
@@ -18,5 +26,6 @@ def setup_tracing(app) -> None:
         exporter = OTLPSpanExporter(endpoint=f"{endpoint}/v1/traces")
         span_processor = BatchSpanProcessor(exporter)
         provider.add_span_processor(span_processor)
+        _exporting = True
 
     FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
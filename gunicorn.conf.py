@@ -0,0 +1,20 @@
+# Shared-weights serving: models load once in the master, workers fork from it.
+#   gunicorn -c gunicorn.conf.py app.main:app
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+
+
+def when_ready(server):  # type: ignore
+    # Runs in the master after app.main is imported and before any worker is forked.
+    from app.main import models
+    from app.utils.memory import freeze_heap
+
+    models.preload()
+    freeze_heap()
+    server.log.info("models preloaded; forking %d workers", workers)
@@ -0,0 +1,8 @@
+# Replays a request trace against the app in-process; extra flags go to app/benchmarks/load_test.py.
+set -euo pipefail
+ROOT=$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." &> /dev/null && pwd)
+TRACE=${1:-"$ROOT/app/benchmarks/traces/sample.jsonl"}
+OUT=${2:-"$ROOT/bench_results.json"}
+
+PYTHONPATH="$ROOT" python -m app.benchmarks.load_test --trace "$TRACE" --out "$OUT" "${@:3}"
+echo "$OUT"
@@ -5,5 +5,5 @@ ROOT=$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." &> /dev/null && pwd)
 MODEL_DIR=${1:?"Usage: $0 path/to/models"}
 OUT_DIR=${2:-"$ROOT/onnx"}
 
-python "$ROOT/app/training/export_onnx.py" --model_dir "$MODEL_DIR" --out "$OUT_DIR"
+python "$ROOT/app/training/export_onnx.py" --model_dir "$MODEL_DIR" --out "$OUT_DIR" "${@:3}"
 echo "$OUT_DIR"}
@@ -0,0 +1,8 @@
+# copyright github
+set -euo pipefail
+ROOT=$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")/.." &> /dev/null && pwd)
+cd "$ROOT"
+
+# Workers share the master's model pages copy-on-write; compare pss_bytes in /v1/status.
+export WEB_CONCURRENCY=${1:-${WEB_CONCURRENCY:-2}}
+exec gunicorn -c gunicorn.conf.py app.main:app